@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.utils import json_codec
+
+SIGNED_PAYLOADS = [
+    {"data": {"position": 2, "buildingKey": "farm_1"}},
+    {"data": {"initData": "query_id=AAH&user=%7B%22id%22%3A1%7D&auth_date=1700000000&hash=abc", "platform": "android",
+              "chatId": ""}},
+    {"data": {"lang": "ru", "name": "Иван"}},
+    {"data": {"ratio": 0.1, "values": [1, 2.5, 1e16]}},
+    {"data": {"name": "del\x7fchar"}},
+]
+
+USER_DATA = json.dumps({
+    "profile": {"publicName": "bench", "id": 1},
+    "hero": {
+        "race": "elves", "level": 12, "power": 4321,
+        "onboarding": [{"id": step} for step in range(10000, 10400, 10)],
+        "resources": {name: {"value": 1234, "max": 5000, "perHour": 120} for name in ("wood", "food", "stone", "gold")},
+    },
+    "buildings": [{"buildingKey": f"building_{i}", "position": i, "level": i % 5 + 1,
+                   "finishAt": "2026-01-01T00:00:00Z"} for i in range(40)],
+    "troops": [{"troopKey": f"troop_{i}", "count": i * 3} for i in range(20)],
+    "targets": [{"id": i, "type": "oasis", "isCanAttack": bool(i % 2)} for i in range(60)],
+}).encode()
+
+
+def check_signed_identity() -> None:
+    for payload in SIGNED_PAYLOADS:
+        expected = json.dumps(payload, separators=(',', ':'))
+        actual = json_codec.dumps_signed(payload)
+        assert actual == expected, f"signed body mismatch: {actual!r} != {expected!r}"
+
+
+def bench(label: str, func, number: int) -> None:
+    best = min(timeit.repeat(func, number=number, repeat=5))
+    print(f"{label:<32} {best / number * 1e6:8.2f} us")
+
+
+def main() -> None:
+    check_signed_identity()
+    print(f"backend: {json_codec.BACKEND}")
+    payload = SIGNED_PAYLOADS[1]
+    bench("dumps signed (stdlib)", lambda: json.dumps(payload, separators=(',', ':')), 20000)
+    bench("dumps signed (codec)", lambda: json_codec.dumps_signed(payload), 20000)
+    bench("loads user data (stdlib, str)", lambda: json.loads(USER_DATA.decode()), 2000)
+    bench("loads user data (codec, bytes)", lambda: json_codec.loads(USER_DATA), 2000)
+    config = {f"session_{i}": {"api": {"api_id": 4, "api_hash": "x" * 32}, "proxy": None} for i in range(500)}
+    bench("dumps config (stdlib, indent)", lambda: json.dumps(config, indent=2), 200)
+    bench("dumps config (codec, indent)", lambda: json_codec.dumps(config, indent=True), 200)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger as base_logger
+
+from bot.config import settings
+from bot.utils.logger import QueueSink, log_debug
+
+# bot.utils re-exports the logger object under the module's name, so fetch the module itself
+bot_logger = sys.modules["bot.utils.logger"]
+
+FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {message}"
+SESSION = "session_01"
+URL_PATH = "/building/buy"
+HEADERS = {"api-hash": "f" * 32, "api-key": "a" * 64, "api-time": "1700000000", "Content-Type": "application/json"}
+BODY = '{"data":{"position":2,"buildingKey":"farm_1"}}'
+
+
+def legacy_request(logger, debug_enabled_source) -> None:
+    # Log calls made for one API request before the change: guards read pydantic settings,
+    # debug lines are f-strings and the stdout sink writes on the calling thread
+    if debug_enabled_source.DEBUG_LOGGING:
+        logger.debug(f"[{SESSION}] make_request: method=POST, url=https://api.fomofighters.xyz{URL_PATH}")
+    if debug_enabled_source.DEBUG_LOGGING:
+        logger.debug(f"[{SESSION}] API Request: {URL_PATH}")
+        logger.debug(f"[{SESSION}] Headers: {HEADERS}")
+        logger.debug(f"[{SESSION}] Body: {BODY}")
+    if debug_enabled_source.DEBUG_LOGGING:
+        logger.debug(f"[{SESSION}] response.status: 200")
+    logger.info(f"{SESSION} | Building farm_1 upgraded")
+
+
+def lazy_request(logger) -> None:
+    log_debug("[{}] make_request: method={}, url={}", SESSION, "POST", f"https://api.fomofighters.xyz{URL_PATH}")
+    log_debug("[{}] API Request: {}", SESSION, URL_PATH)
+    log_debug("[{}] Headers: {}", SESSION, HEADERS)
+    log_debug("[{}] Body: {}", SESSION, BODY)
+    log_debug("[{}] response.status: {}", SESSION, 200)
+    logger.info(f"{SESSION} | Building farm_1 upgraded")
+
+
+class DebugFlag:
+    DEBUG_LOGGING = False
+
+
+class BlockedStream:
+    """Stream that takes 1 ms per write, like a terminal or log driver that is not keeping up."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, message: str) -> None:
+        time.sleep(0.001)
+        self._stream.write(message)
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+
+def run(label: str, sink, request, level: str, number: int, repeat: int = 5, **options) -> None:
+    base_logger.remove()
+    handler_id = base_logger.add(sink, format=FORMAT, level=level, colorize=False, **options)
+    logger = base_logger.opt(colors=True)
+    bot_logger._debug_logger = base_logger.opt(colors=True, depth=1)
+    best = min(timeit.repeat(lambda: request(logger), number=number, repeat=repeat))
+    base_logger.remove(handler_id)
+    print(f"{label:<38} {best / number * 1e6:8.2f} us/request")
+
+
+def read_messages(path: str) -> list:
+    with open(path, encoding="utf-8") as file:
+        return [line.split(" | ", 2)[2] for line in file]
+
+
+def check_output(directory: str) -> None:
+    """Both pipelines must log the same lines when debug logging is on."""
+    bot_logger.DEBUG_LOGGING = DebugFlag.DEBUG_LOGGING = True
+    paths = [os.path.join(directory, name) for name in ("legacy.log", "lazy.log")]
+    for path, request in zip(paths, (lambda logger: legacy_request(logger, DebugFlag), lazy_request)):
+        base_logger.remove()
+        with open(path, "w", encoding="utf-8") as stream:
+            sink = QueueSink(stream)
+            base_logger.add(sink, format=FORMAT, level="DEBUG", colorize=False)
+            bot_logger._debug_logger = base_logger.opt(colors=True, depth=1)
+            request(base_logger.opt(colors=True))
+            base_logger.remove()
+    assert read_messages(paths[0]) == read_messages(paths[1]), "lazy debug lines differ from the f-string ones"
+    bot_logger.DEBUG_LOGGING = DebugFlag.DEBUG_LOGGING = False
+
+
+def main() -> None:
+    number = 20000
+    with tempfile.TemporaryDirectory() as directory:
+        check_output(directory)
+
+        for debug in (False, True):
+            bot_logger.DEBUG_LOGGING = settings.DEBUG_LOGGING = debug
+            level = "DEBUG" if debug else "INFO"
+            print(f"DEBUG_LOGGING={debug}")
+            with open(os.path.join(directory, "sync.log"), "w", encoding="utf-8") as stream:
+                run("  f-strings, settings, sync sink", stream,
+                    lambda logger: legacy_request(logger, settings), level, number)
+            with open(os.path.join(directory, "queue.log"), "w", encoding="utf-8") as stream:
+                # Removing the handler stops the sink, which drains the queue before the file closes
+                run("  lazy, cached flag, queue sink", QueueSink(stream), lazy_request, level, number)
+
+        bot_logger.DEBUG_LOGGING = settings.DEBUG_LOGGING = False
+        print("DEBUG_LOGGING=False, stdout blocked 1 ms per write")
+        with open(os.path.join(directory, "blocked.log"), "w", encoding="utf-8") as stream:
+            run("  f-strings, settings, sync sink", BlockedStream(stream),
+                lambda logger: legacy_request(logger, settings), "INFO", 200, repeat=3)
+            run("  lazy, cached flag, queue sink", QueueSink(BlockedStream(stream)), lazy_request, "INFO", 200,
+                repeat=3)
+
+        # The session log file only exists with DEBUG_LOGGING and gets every debug line
+        bot_logger.DEBUG_LOGGING = settings.DEBUG_LOGGING = True
+        print("DEBUG_LOGGING=True, session log file")
+        run("  enqueue=True file sink", os.path.join(directory, "enqueue.log"), lazy_request, "DEBUG", number,
+            enqueue=True)
+        with open(os.path.join(directory, "file_queue.log"), "a", encoding="utf-8") as stream:
+            run("  queue sink", QueueSink(stream), lazy_request, "DEBUG", number)
+        bot_logger.DEBUG_LOGGING = settings.DEBUG_LOGGING = False
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+import sys
+import timeit
+from time import time
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import CookieJar
+from http.cookies import SimpleCookie
+from yarl import URL
+
+from bot.core.headers import FOMOFIGHTERS_BASE_HEADERS
+from bot.core.request_builder import RequestBuilder
+
+API_URL = "https://api.fomofighters.xyz"
+PAYLOAD = {"data": {"position": 2, "buildingKey": "farm_1"}}
+
+
+def make_cookie_jar() -> CookieJar:
+    jar = CookieJar(unsafe=True)
+    cookies = SimpleCookie()
+    cookies["user_auth_hash"] = "a" * 64
+    for i in range(10):
+        cookies[f"tracking_{i}"] = str(i)
+    jar.update_cookies(cookies, URL(API_URL))
+    return jar
+
+
+def legacy_build(jar: CookieJar) -> dict:
+    api_time = int(time())
+    api_key = jar.filter_cookies(URL(API_URL))["user_auth_hash"].value
+    body = json.dumps(PAYLOAD, separators=(',', ':'))
+    api_hash = hashlib.md5(quote(f"{api_time}_{body}", safe="~()*!.'-_").encode()).hexdigest()
+    headers = dict(FOMOFIGHTERS_BASE_HEADERS)
+    headers.update({"api-hash": api_hash, "api-key": api_key, "api-time": str(api_time)})
+    return {"url": f"{API_URL}/building/buy", "headers": headers, "data": body}
+
+
+def builder_build(builder: RequestBuilder, jar: CookieJar) -> dict:
+    # Same calls as FomoFightersBot._send_api_request, which checks the response cache between them
+    if builder.api_key is None:
+        builder.api_key = jar.filter_cookies(URL(API_URL))["user_auth_hash"].value
+    body = builder.body(PAYLOAD)
+    headers = builder.headers(builder.api_key, body)
+    return {"url": builder.url("/building/buy"), "headers": headers, "data": body}
+
+
+def main() -> None:
+    jar = make_cookie_jar()
+    builder = RequestBuilder(API_URL)
+    legacy, built = legacy_build(jar), builder_build(builder, jar)
+    assert legacy == built, "request builder output differs from the legacy pipeline"
+
+    number = 20000
+    for label, func in (("legacy pipeline", lambda: legacy_build(jar)),
+                        ("request builder", lambda: builder_build(builder, jar))):
+        best = min(timeit.repeat(func, number=number, repeat=5))
+        print(f"{label:<20} {best / number * 1e6:8.2f} us/request")
+
+
+if __name__ == '__main__':
+    main()
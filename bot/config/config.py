@@ -12,6 +12,8 @@ class Settings(BaseSettings):
     FIX_CERT: bool = False
 
     SESSION_START_DELAY: int = 360
+    MIN_SLEEP_TIME: int = 600
+    MAX_SLEEP_TIME: int = 7200
 
     REF_ID: str = 'ref228618799'
     SESSIONS_PER_PROXY: int = 1
@@ -22,6 +24,24 @@ class Settings(BaseSettings):
 
     DEBUG_LOGGING: bool = False
 
+    REQUEST_RETRY_BUDGET: int = 4
+    RETRY_AFTER_MAX: int = 300
+    API_RATE_LIMIT: float = 20
+    API_AUTH_RATE_LIMIT: float = 0.5
+    CIRCUIT_FAILURE_THRESHOLD: int = 20
+    CIRCUIT_RECOVERY_TIMEOUT: int = 60
+    CIRCUIT_HALF_OPEN_PROBES: int = 3
+    PROXY_DAILY_BUDGET_MB: float = 0
+    PROXY_BUDGET_SOFT_LIMIT: float = 0.8
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 0
+    TRACE_FILE: str = ""
+    SLOW_REQUEST_THRESHOLD: float = 5
+    LOOP_LAG_THRESHOLD: float = 1
+    LOG_AGGREGATION_WINDOW: float = 10
+    JOURNAL_DIR: str = ""
+    FLEET_DB: str = ""
+
     AUTO_UPDATE: bool = True
     CHECK_UPDATE_INTERVAL: int = 60
     BLACKLISTED_SESSIONS: str = ""
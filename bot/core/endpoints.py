@@ -0,0 +1,209 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+INVALIDATES_ALL = None
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    path: str
+    payload: Callable[..., dict]
+    cache_ttl: float = 0
+    idempotent: bool = False
+    rate_class: str = "write"
+    timeout: float = 60
+    invalidates: Optional[Tuple[str, ...]] = INVALIDATES_ALL
+    success_message: Optional[str] = None
+    failure_message: Optional[str] = None
+    error_message: str = "Ошибка запроса {path}"
+    low_value: bool = False
+    # Request fields that identify the created building, troop or attack in the response
+    timer_keys: Tuple[str, ...] = ()
+
+    @property
+    def cacheable(self) -> bool:
+        return self.cache_ttl > 0
+
+    def created_entity(self, payload: dict) -> Dict[str, Any]:
+        data = payload.get("data")
+        if not isinstance(data, dict):
+            return {}
+        return {key: data[key] for key in self.timer_keys if key in data}
+
+
+_ATTACK_INVALIDATES = ("/attack/info", "/troops/info", "/building/info", "/user/data/all")
+
+ENDPOINTS: Dict[str, Endpoint] = {
+    "telegram_auth": Endpoint(
+        path="/telegram/auth",
+        payload=lambda data: {"data": data},
+        idempotent=True,
+        rate_class="auth",
+        timeout=30,
+    ),
+    "user_data": Endpoint(
+        path="/user/data/all",
+        payload=lambda: {"data": {}},
+        cache_ttl=30,
+        idempotent=True,
+        rate_class="read",
+        timeout=30,
+        error_message="Ошибка получения данных пользователя",
+    ),
+    "user_data_after": Endpoint(
+        path="/user/data/after",
+        payload=lambda lang: {"data": {"lang": lang}},
+        idempotent=True,
+        rate_class="read",
+        timeout=30,
+        invalidates=(),
+        low_value=True,
+    ),
+    "onboarding_finish": Endpoint(
+        path="/onboarding/finish",
+        payload=lambda step: {"data": step},
+        idempotent=True,
+        invalidates=("/user/data/all",),
+        success_message="Шаг обучения {step} завершен",
+        failure_message="Шаг обучения {step} не завершен: {response}",
+        error_message="Ошибка на шаге {step}",
+    ),
+    "race_select": Endpoint(
+        path="/race/select",
+        payload=lambda race: {"data": race},
+        success_message="Выбрана раса: {race}",
+        failure_message="Ошибка выбора расы: {response}",
+        error_message="Ошибка при выборе расы",
+    ),
+    "building_buy": Endpoint(
+        path="/building/buy",
+        payload=lambda position, building_key: {"data": {"position": position, "buildingKey": building_key}},
+        invalidates=("/building/info", "/user/data/all"),
+        success_message="Построено здание: {building_key} на позиции {position}",
+        failure_message="Не удалось построить {building_key}: {response}",
+        error_message="Ошибка при постройке здания",
+        timer_keys=("position",),
+    ),
+    "building_upgrade": Endpoint(
+        path="/building/buy",
+        payload=lambda position, building_key: {"data": {"position": position, "buildingKey": building_key}},
+        invalidates=("/building/info", "/user/data/all"),
+        success_message="Улучшено здание: {building_key} на позиции {position}",
+        failure_message="Не удалось улучшить {building_key}: {response}",
+        error_message="Ошибка при улучшении здания",
+        timer_keys=("position",),
+    ),
+    "resource_claim": Endpoint(
+        path="/resource/claim",
+        payload=lambda resource_type: {"data": resource_type},
+        idempotent=True,
+        invalidates=("/user/data/all",),
+        success_message="Собран ресурс: {resource_type}",
+        error_message="Ошибка при сборе ресурса",
+    ),
+    "building_info": Endpoint(
+        path="/building/info",
+        payload=lambda: {},
+        cache_ttl=30,
+        idempotent=True,
+        rate_class="read",
+        timeout=30,
+        error_message="Ошибка получения информации о зданиях",
+        low_value=True,
+    ),
+    "troops_buy": Endpoint(
+        path="/troops/buy",
+        payload=lambda troop_key, count: {"data": {"troopKey": troop_key, "count": count}},
+        invalidates=("/troops/info", "/user/data/all"),
+        success_message="Обучено войск: {troop_key} x{count}",
+        failure_message="Не удалось обучить войска: {response}",
+        error_message="Ошибка при обучении войск",
+        timer_keys=("troopKey",),
+    ),
+    "troops_info": Endpoint(
+        path="/troops/info",
+        payload=lambda: {},
+        cache_ttl=15,
+        idempotent=True,
+        rate_class="read",
+        timeout=30,
+        error_message="Ошибка получения информации о войсках",
+        low_value=True,
+    ),
+    "attack_create": Endpoint(
+        path="/attack/create",
+        payload=lambda target_id, troops: {"data": {"target": target_id, "troops": troops}},
+        invalidates=_ATTACK_INVALIDATES,
+        success_message="Атака отправлена на цель: {target_id}",
+        failure_message="Не удалось отправить атаку: {response}",
+        error_message="Ошибка при создании атаки",
+        timer_keys=("target",),
+    ),
+    "scout_create": Endpoint(
+        path="/attack/create/scout",
+        payload=lambda target_id, troops: {"data": {"target": target_id, "troops": troops}},
+        invalidates=_ATTACK_INVALIDATES,
+        success_message="Разведка отправлена на цель: {target_id}",
+        failure_message="Не удалось отправить разведку: {response}",
+        error_message="Ошибка при создании разведки",
+    ),
+    "attack_info": Endpoint(
+        path="/attack/info",
+        payload=lambda: {},
+        cache_ttl=10,
+        idempotent=True,
+        rate_class="read",
+        timeout=30,
+        error_message="Ошибка получения информации об атаках",
+        low_value=True,
+    ),
+    "quest_main_claim": Endpoint(
+        path="/quest/main/claim",
+        payload=lambda quest_key: {"data": {"questKey": quest_key}},
+        idempotent=True,
+        invalidates=("/user/data/all",),
+        success_message="Получена награда за квест: {quest_key}",
+        error_message="Ошибка при получении награды за квест",
+    ),
+    "quest_side_claim": Endpoint(
+        path="/quest/side/claim",
+        payload=lambda quest_key: {"data": quest_key},
+        idempotent=True,
+        invalidates=("/user/data/all",),
+        success_message="Получена награда за побочный квест: {quest_key}",
+        error_message="Ошибка при получении награды за побочный квест",
+    ),
+    "quest_check": Endpoint(
+        path="/quest/check",
+        payload=lambda quest_key: {"data": [quest_key, None]},
+        idempotent=True,
+        invalidates=(),
+        error_message="Ошибка проверки подписки TG",
+    ),
+    "quest_claim": Endpoint(
+        path="/quest/claim",
+        payload=lambda quest_key: {"data": [quest_key, None]},
+        idempotent=True,
+        invalidates=("/user/data/all",),
+        success_message="Получена награда за подписку на TG",
+        error_message="Ошибка при получении награды за TG",
+    ),
+}
+
+ENDPOINTS_BY_PATH: Dict[str, Endpoint] = {}
+for _endpoint in ENDPOINTS.values():
+    ENDPOINTS_BY_PATH.setdefault(_endpoint.path, _endpoint)
+
+DEFAULT_ENDPOINT = Endpoint(path="", payload=lambda: {})
+
+
+def endpoint_for_path(path: str) -> Endpoint:
+    return ENDPOINTS_BY_PATH.get(path, DEFAULT_ENDPOINT)
+
+
+def cache_ttls() -> Dict[str, float]:
+    return {e.path: e.cache_ttl for e in ENDPOINTS_BY_PATH.values() if e.cacheable}
+
+
+def cache_invalidations() -> Dict[str, Optional[Tuple[str, ...]]]:
+    return {e.path: e.invalidates for e in ENDPOINTS_BY_PATH.values() if not e.cacheable}
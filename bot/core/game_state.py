@@ -0,0 +1,189 @@
+from time import time
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from bot.core.game_timers import iter_timers
+
+CAPACITY_KEYS = ("max", "limit", "capacity", "storage")
+HOURLY_RATE_KEYS = ("perHour", "production", "income")
+
+
+def _number(source: dict, keys: tuple) -> Optional[float]:
+    for key in keys:
+        value = source.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+    return None
+
+
+def _as_list(value: Any, key_name: str) -> list:
+    if isinstance(value, dict):
+        return [{key_name: key, **item} if isinstance(item, dict) else {key_name: key, "value": item}
+                for key, item in value.items()]
+    return value if isinstance(value, list) else []
+
+
+class Resource:
+    __slots__ = ("value", "capacity", "per_hour")
+
+    def __init__(self, value: float = 0, capacity: Optional[float] = None, per_hour: Optional[float] = None):
+        self.value = value
+        self.capacity = capacity
+        self.per_hour = per_hour
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Resource':
+        return cls(_number(data, ("value",)) or 0, _number(data, CAPACITY_KEYS), _number(data, HOURLY_RATE_KEYS))
+
+    def update(self, data: dict) -> None:
+        value = _number(data, ("value",))
+        if value is not None:
+            self.value = value
+        self.capacity = _number(data, CAPACITY_KEYS) or self.capacity
+        self.per_hour = _number(data, HOURLY_RATE_KEYS) or self.per_hour
+
+    def fill_time(self, now: float) -> Optional[float]:
+        if not self.capacity or not self.per_hour or self.per_hour <= 0 or self.value >= self.capacity:
+            return None
+        return now + (self.capacity - self.value) / self.per_hour * 3600
+
+
+class Building:
+    __slots__ = ("key", "position", "level")
+
+    def __init__(self, key: str, position: int, level: int):
+        self.key = key
+        self.position = position
+        self.level = level
+
+
+class Target:
+    __slots__ = ("id", "type", "can_attack")
+
+    def __init__(self, target_id: Any, target_type: Optional[str], can_attack: bool):
+        self.id = target_id
+        self.type = target_type
+        self.can_attack = can_attack
+
+
+class Hero:
+    __slots__ = ("race", "level", "power", "onboarding", "resources")
+
+    def __init__(self):
+        self.race: Optional[str] = None
+        self.level = 0
+        self.power = 0
+        self.onboarding: Set[int] = set()
+        self.resources: Dict[str, Resource] = {}
+
+    def update(self, data: dict) -> None:
+        self.race = data.get("race", self.race)
+        self.level = data.get("level", self.level)
+        self.power = data.get("power", self.power)
+        if "onboarding" in data:
+            self.onboarding = set(_onboarding_steps(data["onboarding"]))
+        resources = data.get("resources")
+        if isinstance(resources, dict):
+            for name, value in resources.items():
+                if not isinstance(value, dict):
+                    continue
+                if name in self.resources:
+                    self.resources[name].update(value)
+                else:
+                    self.resources[name] = Resource.from_dict(value)
+
+    def resource(self, name: str) -> float:
+        resource = self.resources.get(name)
+        return resource.value if resource else 0
+
+
+def _onboarding_steps(steps: Any) -> Iterator[int]:
+    for step in steps or []:
+        step = step.get("id", step.get("step")) if isinstance(step, dict) else step
+        if isinstance(step, int) or (isinstance(step, str) and step.isdigit()):
+            yield int(step)
+
+
+class GameState:
+    __slots__ = ("public_name", "hero", "buildings", "troops", "targets", "quests", "timers", "stale")
+
+    def __init__(self):
+        self.public_name = "Unknown"
+        self.hero = Hero()
+        self.buildings: Dict[int, Building] = {}
+        self.troops: Dict[str, int] = {}
+        self.targets: List[Target] = []
+        self.quests: Set[str] = set()
+        self.timers: List[float] = []
+        self.stale = False
+
+    @classmethod
+    def from_user_data(cls, data: dict) -> 'GameState':
+        state = cls()
+        state.public_name = data.get("profile", {}).get("publicName", state.public_name)
+        state.apply(data)
+        return state
+
+    @property
+    def race(self) -> Optional[str]:
+        return self.hero.race
+
+    @property
+    def onboarding(self) -> Set[int]:
+        return self.hero.onboarding
+
+    def has_building(self, position: int, level: int = 1) -> bool:
+        building = self.buildings.get(position)
+        return building is not None and building.level >= level
+
+    def apply(self, data: Any) -> bool:
+        if not isinstance(data, dict):
+            return False
+
+        hero = data.get("hero")
+        hero_updated = True
+        if isinstance(hero, dict):
+            self.hero.update(hero)
+        elif isinstance(data.get("resources"), dict):
+            self.hero.update({"resources": data["resources"]})
+        else:
+            hero_updated = False
+        hero = hero if isinstance(hero, dict) else {}
+
+        for building in _as_list(data.get("buildings") or hero.get("buildings"), "position"):
+            key = building.get("buildingKey") or building.get("key")
+            position = building.get("position")
+            if key and str(position).isdigit():
+                self.buildings[int(position)] = Building(key, int(position), int(building.get("level", 1) or 1))
+
+        for troop in _as_list(data.get("troops") or hero.get("troops"), "troopKey"):
+            key = troop.get("troopKey") or troop.get("key")
+            count = troop.get("count", troop.get("value"))
+            if key and isinstance(count, int):
+                self.troops[key] = count
+
+        if "targets" in data:
+            self.targets = [Target(target.get("id"), target.get("type"), bool(target.get("isCanAttack")))
+                            for target in data.get("targets") or [] if isinstance(target, dict)]
+
+        for source in (data.get("quests"), hero.get("quests")):
+            for quest in _as_list(source, "key"):
+                if isinstance(quest, str):
+                    self.quests.add(quest)
+                elif isinstance(quest, dict) and (quest.get("isClaimed") or quest.get("claimed") or quest.get("value") is True):
+                    self.quests.add(quest.get("key") or quest.get("questKey"))
+
+        now = time()
+        self.timers = sorted(timer for timer in set(self.timers).union(iter_timers(data, now)) if timer > now)
+        return hero_updated
+
+    def next_event(self, now: Optional[float] = None) -> Optional[float]:
+        now = time() if now is None else now
+        candidates = [timer for timer in self.timers if timer > now][:1]
+        candidates.extend(filter(None, (resource.fill_time(now) for resource in self.hero.resources.values())))
+        return min(candidates, default=None)
+
+    def find_target(self, target_type: str) -> Optional[Any]:
+        for target in self.targets:
+            if target.type == target_type and target.can_attack:
+                return target.id
+        return None
@@ -0,0 +1,75 @@
+from datetime import datetime
+from time import time
+from typing import Any, Dict, Iterator, Optional
+
+TIMESTAMP_KEYS = frozenset({
+    "finishAt", "finishedAt", "finishTime", "endAt", "endTime", "endsAt",
+    "completeAt", "completedAt", "readyAt", "doneAt", "returnAt", "arrivalAt", "arriveAt",
+})
+DURATION_KEYS = frozenset({"timeLeft", "secondsLeft", "leftTime", "remainingTime"})
+
+
+def to_epoch_seconds(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        seconds = value / 1000 if value > 1e12 else float(value)
+        return seconds if seconds > 1e9 else None
+    if isinstance(value, str):
+        if value.isdigit():
+            return to_epoch_seconds(int(value))
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def iter_timers(payload: Any, now: float) -> Iterator[float]:
+    if isinstance(payload, dict):
+        for key, value in payload.items():
+            if key in TIMESTAMP_KEYS:
+                timestamp = to_epoch_seconds(value)
+                if timestamp is not None:
+                    yield timestamp
+            elif key in DURATION_KEYS and isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield now + (value / 1000 if value > 1e6 else value)
+            elif isinstance(value, (dict, list)):
+                yield from iter_timers(value, now)
+    elif isinstance(payload, list):
+        for item in payload:
+            yield from iter_timers(item, now)
+
+
+def iter_entity_timers(payload: Any, entity: Dict[str, Any], now: float) -> Iterator[float]:
+    if isinstance(payload, dict):
+        if all(payload.get(key) == value for key, value in entity.items()):
+            yield from iter_timers(payload, now)
+            return
+        for value in payload.values():
+            if isinstance(value, (dict, list)):
+                yield from iter_entity_timers(value, entity, now)
+    elif isinstance(payload, list):
+        for item in payload:
+            yield from iter_entity_timers(item, entity, now)
+
+
+def completion_time(payload: Any, entity: Optional[Dict[str, Any]] = None,
+                    now: Optional[float] = None) -> Optional[float]:
+    """Finish time of ``entity``, the object a call created, found by its request fields.
+
+    Without a match the earliest future timer is used, so an unrelated building, resource or
+    event timer in the payload can shorten a wait but never stretch it.
+    """
+    now = time() if now is None else now
+    if entity:
+        finish_at = min((timer for timer in iter_entity_timers(payload, entity, now) if timer > now), default=None)
+        if finish_at is not None:
+            return finish_at
+    return next_timer(payload, now)
+
+
+def next_timer(payload: Any, now: Optional[float] = None) -> Optional[float]:
+    now = time() if now is None else now
+    return min((timer for timer in iter_timers(payload, now) if timer > now), default=None)
+
@@ -1,4 +1,5 @@
-from typing import Dict
+from types import MappingProxyType
+from typing import Dict, Mapping
 from bot.core.agents import generate_random_user_agent
 
 def get_agentx_headers(token: str) -> dict:
@@ -33,23 +34,29 @@ def get_tonminefarm_headers() -> dict:
         "sec-ch-ua-platform": '"Windows"',
     }
 
+FOMOFIGHTERS_BASE_HEADERS: Mapping[str, str] = MappingProxyType({
+    "accept": "*/*",
+    "accept-language": "ru,en;q=0.9,en-GB;q=0.8,en-US;q=0.7",
+    "api-hash": "",
+    "api-key": "",
+    "api-time": "",
+    "content-type": "application/json",
+    "is-beta-server": "null",
+    "origin": "https://game.fomofighters.xyz",
+    "priority": "u=1, i",
+    "referer": "https://game.fomofighters.xyz/",
+    "sec-ch-ua": '"Microsoft Edge";v="142", "Microsoft Edge WebView2";v="142", "Chromium";v="142", "Not_A Brand";v="99"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+    "sec-fetch-dest": "empty",
+    "sec-fetch-mode": "cors",
+    "sec-fetch-site": "same-site",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36 Edg/142.0.0.0"
+})
+
 def get_fomofighters_headers(api_key: str, api_hash: str, api_time: int) -> dict:
-    return {
-        "accept": "*/*",
-        "accept-language": "ru,en;q=0.9,en-GB;q=0.8,en-US;q=0.7",
-        "api-hash": api_hash,
-        "api-key": api_key,
-        "api-time": str(api_time),
-        "content-type": "application/json",
-        "is-beta-server": "null",
-        "origin": "https://game.fomofighters.xyz",
-        "priority": "u=1, i",
-        "referer": "https://game.fomofighters.xyz/",
-        "sec-ch-ua": '"Microsoft Edge";v="142", "Microsoft Edge WebView2";v="142", "Chromium";v="142", "Not_A Brand";v="99"',
-        "sec-ch-ua-mobile": "?0",
-        "sec-ch-ua-platform": '"Windows"',
-        "sec-fetch-dest": "empty",
-        "sec-fetch-mode": "cors",
-        "sec-fetch-site": "same-site",
-        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36 Edg/142.0.0.0"
-    }
\ No newline at end of file
+    headers = FOMOFIGHTERS_BASE_HEADERS.copy()
+    headers["api-hash"] = api_hash
+    headers["api-key"] = api_key
+    headers["api-time"] = str(api_time)
+    return headers
@@ -15,9 +15,16 @@ from bot.utils.web import run_web_and_tunnel, stop_web_and_tunnel
 from bot.config import settings
 from bot.core.agents import generate_random_user_agent
 from bot.utils import logger, config_utils, proxy_utils, CONFIG_PATH, SESSIONS_PATH, PROXIES_PATH
+from bot.utils.logger import log_aggregator
+from bot.utils.fleet_store import fleet_store
 from bot.core.tapper import run_tapper
 from bot.core.registrator import register_sessions
 from bot.utils.updater import UpdateManager
+from bot.utils.metrics import run_metrics_server, clear_session_state
+from bot.utils.loop_monitor import monitor_event_loop
+from bot.utils.profiler import DEFAULT_PROFILE_WINDOW, run_profile, session_task_name
+from bot.utils.task_dump import write_task_dump
+from bot.utils.tracing import exporter as span_exporter
 from bot.exceptions import InvalidSession
 
 from telethon.errors import (
@@ -89,6 +96,8 @@ async def process() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("-a", "--action", type=int, help="Action to perform")
     parser.add_argument("--update-restart", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--profile", type=float, metavar="SECONDS",
+                        help="Sample CPU per asyncio task for SECONDS and write collapsed stacks to logs/")
     args = parser.parse_args()
 
     if not settings.USE_PROXY:
@@ -104,7 +113,7 @@ async def process() -> None:
     if action == 1:
         if not API_ID or not API_HASH:
             raise ValueError("API_ID and API_HASH not found in the .env file.")
-        await run_tasks()
+        await run_tasks(profile_seconds=args.profile or 0)
     elif action == 2:
         await register_sessions()
     elif action == 3:
@@ -261,18 +270,51 @@ async def init_config_file() -> None:
             if accounts_config.get(session_name) != session_config:
                 await config_utils.update_session_config_in_file(session_name, session_config, CONFIG_PATH)
 
-async def run_tasks() -> None:
+def start_profile(duration: float, signal_tasks: set) -> None:
+    task = asyncio.create_task(run_profile(duration), name="profiler")
+    signal_tasks.add(task)
+    task.add_done_callback(signal_tasks.discard)
+
+def start_task_dump(signal_tasks: set) -> None:
+    task = asyncio.create_task(write_task_dump(), name="task-dump")
+    signal_tasks.add(task)
+    task.add_done_callback(signal_tasks.discard)
+
+async def run_tasks(profile_seconds: float = 0) -> None:
     await config_utils.restructure_config(CONFIG_PATH)
     await init_config_file()
     
     base_tasks = []
+    signal_tasks = set()
+
+    if profile_seconds > 0:
+        start_profile(profile_seconds, signal_tasks)
+    if hasattr(signal, "SIGUSR2"):
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGUSR2, start_profile, profile_seconds or DEFAULT_PROFILE_WINDOW, signal_tasks)
+    if hasattr(signal, "SIGUSR1"):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, start_task_dump, signal_tasks)
+
+    if settings.METRICS_PORT:
+        base_tasks.append(asyncio.create_task(run_metrics_server()))
+
+    if settings.LOOP_LAG_THRESHOLD > 0:
+        base_tasks.append(asyncio.create_task(monitor_event_loop()))
+
+    if settings.LOG_AGGREGATION_WINDOW > 0:
+        base_tasks.append(asyncio.create_task(log_aggregator.run()))
+
+    if fleet_store.enabled:
+        base_tasks.append(asyncio.create_task(fleet_store.run()))
     
     if settings.AUTO_UPDATE:
         update_manager = UpdateManager()
         base_tasks.append(asyncio.create_task(update_manager.run()))
     
     tg_clients = await get_tg_clients()
-    client_tasks = [asyncio.create_task(handle_tapper_session(tg_client=tg_client)) for tg_client in tg_clients]
+    client_tasks = [asyncio.create_task(handle_tapper_session(tg_client=tg_client),
+                                        name=session_task_name(tg_client.session_name))
+                    for tg_client in tg_clients]
     
     try:
         if client_tasks:
@@ -290,32 +332,36 @@ async def run_tasks() -> None:
                 task.cancel()
         await asyncio.gather(*client_tasks + base_tasks, return_exceptions=True)
         raise
+    finally:
+        await span_exporter.close()
         
 async def handle_tapper_session(tg_client: UniversalTelegramClient, stats_bot: Optional[object] = None):
     session_name = tg_client.session_name
-    try:
-        logger.info(f"{session_name} | Starting session")
-        await run_tapper(tg_client=tg_client)
-    except InvalidSession as e:
-        logger.error(f"Invalid session: {session_name}: {e}")
-        if settings.DEBUG_LOGGING:
-            logger.debug(f"[{session_name}] InvalidSession details: {e}")
-        await move_invalid_session_to_error_folder(session_name)
-    except (AuthKeyUnregisteredError, AuthKeyDuplicatedError, AuthKeyError, 
-            SessionPasswordNeededError) as e:
-        logger.error(f"Authentication error for Telethon session {session_name}: {e}")
-        if settings.DEBUG_LOGGING:
-            logger.debug(f"[{session_name}] Telethon Auth error details: {e}")
-        await move_invalid_session_to_error_folder(session_name)
-    except (PyrogramAuthKeyUnregisteredError,
-            PyrogramSessionPasswordNeededError, PyrogramSessionRevoked) as e:
-        logger.error(f"Authentication error for Pyrogram session {session_name}: {e}")
-        if settings.DEBUG_LOGGING:
-            logger.debug(f"[{session_name}] Pyrogram Auth error details: {e}")
-        await move_invalid_session_to_error_folder(session_name)
-    except Exception as e:
-        logger.error(f"Unexpected error in session {session_name}: {e}")
-        if settings.DEBUG_LOGGING:
-            logger.debug(f"[{session_name}] Unexpected exception details: {e}")
-    finally:
-        logger.info(f"{session_name} | Session ended")
\ No newline at end of file
+    with logger.contextualize(session=session_name):
+        try:
+            logger.info(f"{session_name} | Starting session")
+            await run_tapper(tg_client=tg_client)
+        except InvalidSession as e:
+            logger.error(f"Invalid session: {session_name}: {e}")
+            if settings.DEBUG_LOGGING:
+                logger.debug(f"[{session_name}] InvalidSession details: {e}")
+            await move_invalid_session_to_error_folder(session_name)
+        except (AuthKeyUnregisteredError, AuthKeyDuplicatedError, AuthKeyError, 
+                SessionPasswordNeededError) as e:
+            logger.error(f"Authentication error for Telethon session {session_name}: {e}")
+            if settings.DEBUG_LOGGING:
+                logger.debug(f"[{session_name}] Telethon Auth error details: {e}")
+            await move_invalid_session_to_error_folder(session_name)
+        except (PyrogramAuthKeyUnregisteredError,
+                PyrogramSessionPasswordNeededError, PyrogramSessionRevoked) as e:
+            logger.error(f"Authentication error for Pyrogram session {session_name}: {e}")
+            if settings.DEBUG_LOGGING:
+                logger.debug(f"[{session_name}] Pyrogram Auth error details: {e}")
+            await move_invalid_session_to_error_folder(session_name)
+        except Exception as e:
+            logger.error(f"Unexpected error in session {session_name}: {e}")
+            if settings.DEBUG_LOGGING:
+                logger.debug(f"[{session_name}] Unexpected exception details: {e}")
+        finally:
+            clear_session_state(session_name)
+            logger.info(f"{session_name} | Session ended")
\ No newline at end of file
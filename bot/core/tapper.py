@@ -1,27 +1,56 @@
 import aiohttp
 import asyncio
 from typing import Dict, Optional, Any, Tuple, List
-from urllib.parse import urlencode, unquote, urlparse, parse_qsl, urlunparse, quote
 from aiocfscrape import CloudflareScraper
-from aiohttp_proxy import ProxyConnector
 from better_proxy import Proxy
+from yarl import URL
 from random import uniform, randint
-from time import time
+from time import monotonic, time
 from datetime import datetime, timezone
-import json
 import os
-import re
-import hashlib
 
 from bot.utils.universal_telegram_client import UniversalTelegramClient
 from bot.utils.proxy_utils import check_proxy, get_working_proxy
+from bot.utils.http_transport import SessionTransport
+from bot.utils.bandwidth import bandwidth_meter, proxy_label
+from bot.utils.metrics import (
+    HTTP_REQUEST_DURATION, PROXY_CHECK_DURATION, PROXY_CHECKS, PROXY_SWITCHES, RELOGINS, set_session_state
+)
+from bot.utils.init_data import InitData
+from bot.utils.tracing import span, set_attributes
+from bot.utils.journal import SessionJournal
+from bot.utils.fleet_store import fleet_store
 from bot.utils.first_run import check_is_first_run, append_recurring_session
+from bot.utils.circuit_breaker import get_circuit_breaker
+from bot.utils.rate_limiter import api_rate_limiter
+from bot.utils.response_cache import ResponseCache
+from bot.utils.session_state import read_session_state, write_session_state
+from bot.utils.cookie_store import cookies_fingerprint, dump_cookies, load_cookies, restore_cookies, save_cookies
+from bot.utils.retry_policy import (
+    FailureKind, RetryBudget, classify_exception, classify_status, is_safe_to_repeat, parse_retry_after
+)
 from bot.config import settings
-from bot.utils import logger, config_utils, CONFIG_PATH
-from bot.exceptions import InvalidSession
-from bot.core.headers import get_tonminefarm_headers, get_fomofighters_headers
+from bot.utils import logger, config_utils, json_codec, CONFIG_PATH
+from bot.utils.logger import DEBUG_LOGGING, log_debug
+from bot.exceptions import InvalidSession, CircuitOpenError, BandwidthBudgetExceeded, RetryBudgetExhausted
+from bot.core.headers import get_tonminefarm_headers
+from bot.core.request_builder import RequestBuilder
+from bot.core.endpoints import ENDPOINTS, endpoint_for_path, cache_ttls, cache_invalidations
+from bot.core.game_state import GameState
+from bot.core.game_timers import completion_time
+from bot.core.tutorial import (
+    ATTACK_WAIT, TUTORIAL_STATE, TUTORIAL_STEPS, CompletionWait, is_tutorial_pending,
+    pending_steps
+)
+
+# Errors that end the current cycle: run() reschedules the session, or stops it on InvalidSession.
+# Every handler below the cycle re-raises them instead of treating them as a failed action
+CYCLE_ERRORS = (InvalidSession, CircuitOpenError, BandwidthBudgetExceeded, RetryBudgetExhausted)
 
 class BaseBot:
+
+    _API_URL: str = ""
+    _AUTH_COOKIE: str = ""
     
     EMOJI = {
         'info': '🔵',
@@ -38,14 +67,17 @@ class BaseBot:
         if hasattr(self.tg_client, 'client'):
             self.tg_client.client.no_updates = True
         self.session_name = tg_client.session_name
-        self._http_client: Optional[CloudflareScraper] = None
+        self._transport: Optional[SessionTransport] = None
         self._current_proxy: Optional[str] = None
-        self._access_token: Optional[str] = None
+        self._access_token: Optional[InitData] = None
         self._refresh_token: Optional[str] = None
         self._is_first_run: Optional[bool] = None
-        self._init_data: Optional[str] = None
+        self._init_data: Optional[InitData] = None
         self._current_ref_id: Optional[str] = None
         self._selected_race: Optional[str] = None
+        self._cookies_fingerprint: Tuple = ()
+        self._resume_with_cookies = False
+        self._journal = SessionJournal(self.session_name)
         
 
         session_config = config_utils.get_session_config(self.session_name, CONFIG_PATH)
@@ -60,6 +92,31 @@ class BaseBot:
             self.tg_client.set_proxy(proxy)
             self._current_proxy = self.proxy
 
+    @property
+    def _http_client(self) -> Optional[CloudflareScraper]:
+        return self._transport.client if self._transport else None
+
+    def _has_auth_cookie(self) -> bool:
+        return bool(self._AUTH_COOKIE) and any(
+            morsel.key == self._AUTH_COOKIE for morsel in self._transport.cookie_jar
+        )
+
+    async def _on_cookies_changed(self) -> None:
+        if not self._transport:
+            return
+        cookies = dump_cookies(self._transport.cookie_jar)
+        fingerprint = cookies_fingerprint(cookies)
+        if fingerprint != self._cookies_fingerprint:
+            self._cookies_fingerprint = fingerprint
+            await save_cookies(self.session_name, cookies)
+
+    def _restore_cookies(self, cookies: List[dict]) -> None:
+        restored = restore_cookies(self._transport.cookie_jar, cookies)
+        self._cookies_fingerprint = cookies_fingerprint(dump_cookies(self._transport.cookie_jar))
+        self._resume_with_cookies = self._has_auth_cookie()
+        if restored and DEBUG_LOGGING:
+            logger.debug(f"[{self.session_name}] Restored cookies: {', '.join(restored)}")
+
     def get_ref_id(self) -> str:
         if self._current_ref_id is None:
             session_hash = sum(ord(c) for c in self.session_name)
@@ -70,70 +127,24 @@ class BaseBot:
                 self._current_ref_id = 'ref228618799'
         return self._current_ref_id
     
-    def _replace_webapp_version(self, url: str, version: str = "9.0") -> str:
-        from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
-
-        parsed = urlparse(url)
-
-        query_params = dict(parse_qsl(parsed.query))
-        query_params["tgWebAppVersion"] = version
-        new_query = urlencode(query_params)
-
-        fragment = parsed.fragment
-        if "tgWebAppVersion=" in fragment:
-            parts = fragment.split("&")
-            parts = [
-                f"tgWebAppVersion={version}" if p.startswith("tgWebAppVersion=") else p
-                for p in parts
-            ]
-            fragment = "&".join(parts)
-
-        new_url = urlunparse((
-            parsed.scheme,
-            parsed.netloc,
-            parsed.path,
-            parsed.params,
-            new_query,
-            fragment
-        ))
-        return new_url
-
     async def get_tg_web_data(self, app_name: str = "fomo_fighters_bot", path: str = "game") -> str:
         try:
-            webview_url = await self.tg_client.get_app_webview_url(
-                app_name,
-                path,
-                self.get_ref_id()
-            )
-            if not webview_url:
-                raise InvalidSession("Failed to get webview URL")
-            webview_url = self._replace_webapp_version(webview_url, "9.0")
-            
-            if settings.DEBUG_LOGGING:
-                logger.debug(f"[{self.session_name}] Original webview_url: {webview_url}")
-            
-
-            hash_index = webview_url.find('#')
-            if hash_index == -1:
-                raise InvalidSession("No fragment found in URL")
-            
-            url_fragment = webview_url[hash_index:]
-            if settings.DEBUG_LOGGING:
-                logger.debug(f"[{self.session_name}] URL fragment: {url_fragment}")
-            
-
-            match = re.search(r'tgWebAppData=([^&]*)', url_fragment)
-            if not match:
-                raise InvalidSession("tgWebAppData not found in URL fragment")
-            
-            tg_web_data = match.group(1)
-            from urllib.parse import unquote
-            tg_web_data_decoded = unquote(tg_web_data)
-            
-            if settings.DEBUG_LOGGING:
-                logger.debug(f"[{self.session_name}] Extracted tgWebAppData: {tg_web_data_decoded}")
-            
-            return tg_web_data_decoded
+            with span("get_tg_web_data"):
+                webview_url = await self.tg_client.get_app_webview_url(
+                    app_name,
+                    path,
+                    self.get_ref_id()
+                )
+                if not webview_url:
+                    raise InvalidSession("Failed to get webview URL")
+                if DEBUG_LOGGING:
+                    logger.debug(f"[{self.session_name}] Original webview_url: {webview_url}")
+
+                self._init_data = InitData.from_webview_url(webview_url)
+                if DEBUG_LOGGING:
+                    logger.debug(f"[{self.session_name}] Extracted tgWebAppData: {self._init_data.raw}")
+
+                return self._init_data.raw
         except Exception as e:
             logger.error(f"Error processing URL: {str(e)}")
             raise InvalidSession(f"Failed to process URL: {str(e)}")
@@ -152,100 +163,208 @@ class BaseBot:
     async def login(self, tg_web_data: str) -> bool:
         raise NotImplementedError("login must be implemented in child class")
 
-    async def make_request(self, method: str, url: str, skip_relogin: bool = False, **kwargs) -> Optional[Dict]:
-        if not self._http_client:
+    async def make_request(self, method: str, url: str, skip_relogin: bool = False,
+                           rate_limit_class: Optional[str] = None, idempotent: bool = True,
+                           raise_on_exhausted: bool = False, **kwargs) -> Optional[Dict]:
+        if not self._transport:
             logger.error(f"[{self.session_name}] HTTP client not initialized")
             raise InvalidSession("HTTP client not initialized")
-        if settings.DEBUG_LOGGING:
-
-            debug_kwargs = kwargs.copy()
-            if 'json' in debug_kwargs:
-                debug_kwargs['json'] = str(debug_kwargs['json'])[:200] + "..."
-            logger.debug(f"[{self.session_name}] make_request: method={method}, url={url}")
-
-        for attempt in range(2):
+        log_debug("[{}] make_request: method={}, url={}", self.session_name, method, url)
+
+        budget = RetryBudget()
+        request_url = URL(url)
+        breaker = get_circuit_breaker(request_url.host)
+        endpoint_label = request_url.path if request_url.host == URL(self._API_URL).host else request_url.host
+        while True:
+            retry_after = None
+            error = None
+            outcome_recorded = False
+            breaker.check()
             try:
-                async with getattr(self._http_client, method.lower())(url, **kwargs) as response:
-                    if settings.DEBUG_LOGGING:
-                        logger.debug(f"[{self.session_name}] response.status: {response.status}")
-                        
-                    if response.status == 200:
-                        return await response.json()
-                        
-                    if response.status in (401, 502, 403, 418) and not skip_relogin:
-                        logger.warning(f"[{self.session_name}] Access token expired or server error ({response.status}), пытаюсь re-login...")
-                        try:
-                            response_text = await response.text()
-                            logger.debug(f"[{self.session_name}] Error response: {response_text}")
-                        except:
-                            pass
-                            
-                        tg_web_data = await self.get_tg_web_data()
-                        relogin = await self.login(tg_web_data)
-                        if relogin:
-                            logger.info(f"[{self.session_name}] Re-login успешен, повтор запроса...")
-                            continue
-                            
-                        logger.error(f"[{self.session_name}] Не удалось re-login, InvalidSession")
-                        raise InvalidSession("Access token expired and could not be refreshed")
-                    
+                if rate_limit_class:
+                    await api_rate_limiter.acquire(rate_limit_class)
+                with HTTP_REQUEST_DURATION.time(endpoint=endpoint_label, status="error") as request_labels:
                     try:
-                        response_text = await response.text()
-                        logger.error(f"[{self.session_name}] Request failed with status {response.status}: {response_text}")
-                    except:
-                        logger.error(f"[{self.session_name}] Request failed with status {response.status}")
-                        
-                    return None
-            except Exception as e:
-                logger.error(f"[{self.session_name}] Request error: {str(e)}")
-                if settings.DEBUG_LOGGING:
-                    logger.debug(f"[{self.session_name}] Exception in make_request: {e}")
+                        async with self._transport.request(method, url, **kwargs) as response:
+                            request_labels["status"] = str(response.status)
+                            set_attributes(status=response.status)
+                            log_debug("[{}] response.status: {}", self.session_name, response.status)
+                            if rate_limit_class:
+                                api_rate_limiter.feedback(rate_limit_class, response.status)
+                            if response.cookies:
+                                await self._on_cookies_changed()
+
+                            kind = classify_status(response.status)
+                            if kind is FailureKind.GATEWAY:
+                                breaker.record_failure()
+                            elif kind is FailureKind.RATE_LIMIT:
+                                breaker.release()
+                            else:
+                                breaker.record_success()
+                            outcome_recorded = True
+
+                            if response.status == 200:
+                                return json_codec.loads(await response.read())
+
+                            try:
+                                response_text = await response.text()
+                            except Exception:
+                                response_text = ""
+
+                            if kind is FailureKind.AUTH and skip_relogin:
+                                kind = None
+                            if kind is None:
+                                logger.error(f"[{self.session_name}] Request failed with status {response.status}: {response_text}")
+                                return None
+
+                            log_debug("[{}] Error response: {}", self.session_name, response_text)
+                            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                            failure = f"status {response.status}"
+                    except Exception as e:
+                        error = e
+                        request_labels["status"] = type(e).__name__
+                        set_attributes(status=type(e).__name__)
+                        kind = classify_exception(e)
+                        if not outcome_recorded:
+                            if kind is FailureKind.TRANSPORT:
+                                breaker.record_failure()
+                            else:
+                                breaker.release()
+                            outcome_recorded = True
+                        if kind is None:
+                            logger.error(f"[{self.session_name}] Request error: {str(e)}")
+                            log_debug("[{}] Exception in make_request: {}", self.session_name, e)
+                            return None
+                        failure = str(e) or type(e).__name__
+            finally:
+                # A cancelled request would otherwise keep its half-open probe slot
+                if not outcome_recorded:
+                    breaker.release()
+
+            if not idempotent and not is_safe_to_repeat(kind, error):
+                logger.error(f"[{self.session_name}] {kind.value} failure ({failure}) on {url}, not retrying non-idempotent request")
                 return None
 
+            delay = budget.next_delay(kind, retry_after)
+            if delay is None:
+                logger.error(f"[{self.session_name}] {kind.value} failure ({failure}) on {url}, retry budget exhausted")
+                if raise_on_exhausted:
+                    raise RetryBudgetExhausted(url, failure)
+                return None
+
+            if kind is FailureKind.AUTH:
+                logger.warning(f"[{self.session_name}] Access token expired ({failure}), пытаюсь re-login...")
+                tg_web_data = await self.get_tg_web_data()
+                if not await self.login(tg_web_data):
+                    RELOGINS.inc(result="failed")
+                    logger.error(f"[{self.session_name}] Не удалось re-login, InvalidSession")
+                    raise InvalidSession("Access token expired and could not be refreshed")
+                RELOGINS.inc(result="ok")
+                logger.info(f"[{self.session_name}] Re-login успешен, повтор запроса...")
+            else:
+                logger.warning(f"[{self.session_name}] {kind.value} failure ({failure}), retry in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+            kwargs = self._prepare_retry_kwargs(kwargs)
+
+    def _prepare_retry_kwargs(self, kwargs: dict) -> dict:
+        return kwargs
+
+    def _check_api_circuit(self) -> None:
+        if self._API_URL:
+            breaker = get_circuit_breaker(URL(self._API_URL).host)
+            breaker.check_available()
+
+    def _check_bandwidth_budget(self) -> None:
+        if bandwidth_meter.is_exhausted(self._current_proxy):
+            raise BandwidthBudgetExceeded(proxy_label(self._current_proxy), bandwidth_meter.seconds_until_reset())
+
     async def run(self) -> None:
-        if settings.DEBUG_LOGGING:
+        set_session_state(self.session_name, "starting")
+        if DEBUG_LOGGING:
             logger.debug(f"[{self.session_name}] run: start initialize_session")
         if not await self.initialize_session():
             logger.error(f"[{self.session_name}] Failed to initialize session")
             raise InvalidSession("Failed to initialize session")
         random_delay = uniform(1, settings.SESSION_START_DELAY)
         logger.info(f"Bot will start in {int(random_delay)}s")
-        if settings.DEBUG_LOGGING:
+        if DEBUG_LOGGING:
             logger.debug(f"[{self.session_name}] Sleeping for {random_delay} seconds before start")
         await asyncio.sleep(random_delay)
-        proxy_conn = {'connector': ProxyConnector.from_url(self._current_proxy)} if self._current_proxy else {}
-        if settings.DEBUG_LOGGING:
-            logger.debug(f"[{self.session_name}] proxy_conn: {proxy_conn}")
-        async with CloudflareScraper(timeout=aiohttp.ClientTimeout(60), **proxy_conn) as http_client:
-            self._http_client = http_client
+        if DEBUG_LOGGING:
+            logger.debug(f"[{self.session_name}] proxy: {self._current_proxy}")
+        api_host = URL(self._API_URL).host if self._API_URL else None
+        async with SessionTransport(self.session_name, self._current_proxy, api_host) as transport:
+            self._transport = transport
+            self._restore_cookies(load_cookies(self.session_name))
+            await self._on_cookies_changed()
             while True:
                 try:
-                    session_config = config_utils.get_session_config(self.session_name, CONFIG_PATH)
-                    if settings.DEBUG_LOGGING:
-                        logger.debug(f"[{self.session_name}] session_config: {session_config}")
-                    if not await self.check_and_update_proxy(session_config):
-                        logger.warning('Failed to find working proxy. Sleep 5 minutes.')
-                        await asyncio.sleep(300)
-                        continue
-
-                    tg_web_data = await self.get_tg_web_data()
-                    if not await self.login(tg_web_data):
-                        logger.error(f"[{self.session_name}] Login failed")
-                        raise InvalidSession("Login failed")
-
-                    await self.process_bot_logic()
+                    set_session_state(self.session_name, "running")
+                    with span("cycle", session=self.session_name, proxy=proxy_label(self._current_proxy)):
+                        session_config = config_utils.get_session_config(self.session_name, CONFIG_PATH)
+                        if DEBUG_LOGGING:
+                            logger.debug(f"[{self.session_name}] session_config: {session_config}")
+                        if not await self.check_and_update_proxy(session_config):
+                            logger.warning('Failed to find working proxy. Sleep 5 minutes.')
+                            await asyncio.sleep(300)
+                            continue
+
+                        set_attributes(proxy=proxy_label(self._current_proxy))
+                        self._check_api_circuit()
+                        self._check_bandwidth_budget()
+                        if self._resume_with_cookies:
+                            self._resume_with_cookies = False
+                            logger.info(f"{self.session_name} | Продолжаю сессию по сохранённым cookies")
+                        else:
+                            tg_web_data = await self.get_tg_web_data()
+                            if not await self.login(tg_web_data):
+                                logger.error(f"[{self.session_name}] Login failed")
+                                raise InvalidSession("Login failed")
+
+                        await self.process_bot_logic()
                 except InvalidSession as e:
+                    set_session_state(self.session_name, "errored")
+                    self._journal.record("error", kind="InvalidSession", message=str(e))
+                    await self._journal.flush()
                     logger.error(f"[{self.session_name}] InvalidSession: {e}")
-                    if settings.DEBUG_LOGGING:
+                    if DEBUG_LOGGING:
                         logger.debug(f"[{self.session_name}] InvalidSession details: {e}")
                     raise
+                except CircuitOpenError as error:
+                    set_session_state(self.session_name, "sleeping")
+                    self._journal.record("error", kind="CircuitOpenError", message=str(error))
+                    sleep_duration = error.retry_in + uniform(5, 30)
+                    logger.warning(f"[{self.session_name}] API host {error.host} is unavailable. "
+                                   f"Rescheduling in {int(sleep_duration)}s")
+                    await asyncio.sleep(sleep_duration)
+                except RetryBudgetExhausted as error:
+                    set_session_state(self.session_name, "sleeping")
+                    self._journal.record("error", kind="RetryBudgetExhausted", message=str(error))
+                    sleep_duration = uniform(60, 180)
+                    logger.warning(f"[{self.session_name}] {error}. Rescheduling in {int(sleep_duration)}s")
+                    await asyncio.sleep(sleep_duration)
+                except BandwidthBudgetExceeded as error:
+                    set_session_state(self.session_name, "sleeping")
+                    self._journal.record("error", kind="BandwidthBudgetExceeded", message=str(error))
+                    sleep_duration = error.retry_in + uniform(60, 600)
+                    logger.warning(f"[{self.session_name}] Дневной лимит трафика прокси {error.proxy} исчерпан. "
+                                   f"Rescheduling in {int(sleep_duration)}s")
+                    await asyncio.sleep(sleep_duration)
                 except Exception as error:
+                    set_session_state(self.session_name, "errored")
+                    self._journal.record("error", kind=type(error).__name__, message=str(error))
                     sleep_duration = uniform(60, 120)
                     logger.error(f"[{self.session_name}] Unknown error: {error}. Sleeping for {int(sleep_duration)}")
-                    if settings.DEBUG_LOGGING:
+                    if DEBUG_LOGGING:
                         logger.debug(f"[{self.session_name}] Exception details: {error}")
                     await asyncio.sleep(sleep_duration)
 
+    def _record_fleet_snapshot(self, state: GameState, tutorial_done: bool) -> None:
+        hero = state.hero
+        fleet_store.record(self.session_name, hero.level, hero.power,
+                           {name: hero.resource(name) for name in ("food", "wood", "stone", "gem")}, tutorial_done)
+
     async def process_bot_logic(self) -> None:
         raise NotImplementedError("process_bot_logic must be implemented in child class")
 
@@ -253,17 +372,28 @@ class BaseBot:
         if not settings.USE_PROXY:
             return True
 
-        if not self._current_proxy or not await check_proxy(self._current_proxy):
-            new_proxy = await get_working_proxy(accounts_config, self._current_proxy)
+        with span("check_and_update_proxy", proxy=proxy_label(self._current_proxy)) as check_span, \
+                PROXY_CHECK_DURATION.time() as labels:
+            if self._current_proxy and await check_proxy(self._current_proxy, self.session_name):
+                labels["result"] = "ok"
+                PROXY_CHECKS.inc(result="ok")
+                return True
+
+            new_proxy = await get_working_proxy(accounts_config, self._current_proxy, self.session_name)
             if not new_proxy:
+                labels["result"] = "failed"
+                PROXY_CHECKS.inc(result="failed")
                 return False
 
+            labels["result"] = "switched"
+            PROXY_CHECKS.inc(result="switched")
+            check_span.set(switched_to=proxy_label(new_proxy))
             self._current_proxy = new_proxy
-            if self._http_client and not self._http_client.closed:
-                await self._http_client.close()
-
-            proxy_conn = {'connector': ProxyConnector.from_url(new_proxy)}
-            self._http_client = CloudflareScraper(timeout=aiohttp.ClientTimeout(60), **proxy_conn)
+            if self._transport:
+                await self._transport.switch(new_proxy)
+                PROXY_SWITCHES.inc()
+                self._resume_with_cookies = self._has_auth_cookie()
+                await self._on_cookies_changed()
             logger.info(f"{self.session_name} | Switched to new proxy: {new_proxy}")
 
         return True
@@ -271,175 +401,197 @@ class BaseBot:
 class FomoFightersBot(BaseBot):
     
     _API_URL: str = "https://api.fomofighters.xyz"
+    _AUTH_COOKIE: str = "user_auth_hash"
     _AVAILABLE_RACES: list = ["cat", "dog", "frog", "seal", "troll", "man"]
-    
-    def _get_payload_string(self, payload: Optional[dict] = None) -> str:
-        if payload:
-            return json.dumps(payload, separators=(',', ':'))
-        return ""
 
-    def _generate_api_hash(self, api_time: int, payload_string: str) -> str:
-        raw_string = f"{api_time}_{payload_string}"
-
-        encoded_string = quote(raw_string, safe="~()*!.'-_")
-        api_hash = hashlib.md5(encoded_string.encode()).hexdigest()
-        
-        if settings.DEBUG_LOGGING:
-            logger.debug(f"[{self.session_name}] _generate_api_hash: raw_string[:100]={raw_string[:100]}")
-            logger.debug(f"[{self.session_name}] _generate_api_hash: encoded[:100]={encoded_string[:100]}")
-            logger.debug(f"[{self.session_name}] _generate_api_hash: hash={api_hash}")
-        
-        return api_hash
+    def __init__(self, tg_client: UniversalTelegramClient):
+        super().__init__(tg_client)
+        self._response_cache = ResponseCache(cache_ttls(), cache_invalidations())
+        # Finish times of buildings, troops and attacks by endpoint path and the entity's request fields
+        self._completion_times: Dict[Tuple[str, Tuple], float] = {}
+        self._game_state = GameState()
+        self._request_builder = RequestBuilder(self._API_URL)
+
+    async def _on_cookies_changed(self) -> None:
+        self._request_builder.invalidate_api_key()
+        await super()._on_cookies_changed()
     
     def _get_random_race(self) -> str:
         from random import choice
         return choice(self._AVAILABLE_RACES)
     
     def get_dynamic_api_key(self) -> str:
+        api_key = self._request_builder.api_key
+        if api_key is None:
+            api_key = self._request_builder.api_key = self._resolve_api_key()
+        return api_key
 
-        if self._http_client and self._http_client.cookie_jar:
-            cookies = self._http_client.cookie_jar.filter_cookies(self._API_URL)
-            if 'user_auth_hash' in cookies:
-                if settings.DEBUG_LOGGING:
-                    logger.debug(f"[{self.session_name}] Использую user_auth_hash из Cookies")
-                return cookies['user_auth_hash'].value
+    def _resolve_api_key(self) -> str:
+        if self._transport:
+            cookies = self._transport.cookie_jar.filter_cookies(self._API_URL)
+            if self._AUTH_COOKIE in cookies:
+                log_debug("[{}] Использую {} из Cookies", self.session_name, self._AUTH_COOKIE)
+                return cookies[self._AUTH_COOKIE].value
 
         if self._access_token:
-            return self._extract_hash_from_init_data(self._access_token)
+            return self._access_token.hash
         return "empty"
     
-    async def _send_api_request(self, url_path: str, payload: dict = None, api_key: str = None) -> Optional[dict]:
-        api_time = int(time())
-        
-
-        if api_key is None:
-            api_key = self.get_dynamic_api_key()
-            
-
-        body_string = self._get_payload_string(payload)
-        
-
-        api_hash = self._generate_api_hash(api_time, body_string)
-        
+    def _prepare_retry_kwargs(self, kwargs: dict) -> dict:
+        headers = kwargs.get('headers')
+        if not headers or 'api-hash' not in headers:
+            return kwargs
+
+        api_key = headers['api-key'] if headers['api-key'] == "empty" else self.get_dynamic_api_key()
+        return {**kwargs, 'headers': self._request_builder.headers(api_key, kwargs.get('data', ""))}
+
+    async def _send_api_request(self, url_path: str, payload: dict = None, api_key: str = None,
+                                skip_relogin: bool = False, raise_on_exhausted: bool = False) -> Optional[dict]:
+        endpoint = endpoint_for_path(url_path)
+        with span("api_request", endpoint=url_path) as request_span:
+            if api_key is None:
+                api_key = self.get_dynamic_api_key()
+
+            body_string = self._request_builder.body(payload)
+            cacheable = self._response_cache.is_cacheable(url_path)
+            if cacheable:
+                cached = self._response_cache.get(url_path, body_string)
+                if cached is not None:
+                    request_span.set(cached=True)
+                    log_debug("[{}] API Request: {} served from cache", self.session_name, url_path)
+                    return cached
+
+            headers = self._request_builder.headers(api_key, body_string)
+
+            log_debug("[{}] API Request: {}", self.session_name, url_path)
+            log_debug("[{}] Headers: {}", self.session_name, headers)
+            log_debug("[{}] Body: {}", self.session_name, body_string)
+
+            started = monotonic()
+            response = await self.make_request(
+                method="POST",
+                url=self._request_builder.url(url_path),
+                skip_relogin=skip_relogin,
+                raise_on_exhausted=raise_on_exhausted,
+                rate_limit_class=endpoint.rate_class,
+                idempotent=endpoint.idempotent,
+                timeout=aiohttp.ClientTimeout(endpoint.timeout),
+                headers=headers,
+                data=body_string
+            )
+            self._journal.record("api", endpoint=url_path, latency=round(monotonic() - started, 3),
+                                 ok=bool(response and response.get("success")))
 
-        headers = get_fomofighters_headers(api_key, api_hash, api_time)
-        
-        if settings.DEBUG_LOGGING:
-            logger.debug(f"[{self.session_name}] API Request: {url_path}")
-            logger.debug(f"[{self.session_name}] Headers: {headers}")
-            logger.debug(f"[{self.session_name}] Body: {body_string}")
-
-        response = await self.make_request(
-            method="POST",
-            url=f"{self._API_URL}{url_path}",
-            headers=headers,
-            data=body_string
-        )
-        
-        return response
+            if not cacheable:
+                self._response_cache.on_mutation(url_path)
+            elif response and response.get("success"):
+                self._response_cache.set(url_path, body_string, response)
+            return response
 
     async def login(self, tg_web_data: str) -> bool:
-        try:
-            chat_type = self._extract_param_from_init_data(tg_web_data, "chat_type")
-            chat_instance = self._extract_param_from_init_data(tg_web_data, "chat_instance")
-            photo_url = self._extract_photo_url_from_init_data(tg_web_data)
-            
-            request_data = {
-                "data": {
-                    "initData": tg_web_data,
-                    "photoUrl": photo_url,
-                    "platform": "android",
-                    "chatId": "",
-                    "chatType": chat_type if chat_type else "sender",
-                    "chatInstance": chat_instance if chat_instance else ""
+        with span("login") as login_span:
+            try:
+                init_data = self._init_data
+                if init_data is None or init_data.raw != tg_web_data:
+                    init_data = self._init_data = InitData.parse(tg_web_data)
+
+                request_data = {
+                    "data": {
+                        "initData": init_data.raw,
+                        "photoUrl": init_data.photo_url,
+                        "platform": "android",
+                        "chatId": "",
+                        "chatType": init_data.get("chat_type", "sender"),
+                        "chatInstance": init_data.chat_instance
+                    }
                 }
-            }
-            
-            if self._is_first_run:
-                ref_id = self.get_ref_id()
-                request_data["data"]["startParam"] = ref_id
-            
 
-            response = await self._send_api_request("/telegram/auth", request_data, api_key="empty")
-            
-            if response and response.get("success"):
-                self._access_token = tg_web_data
-                logger.info(f"{self.session_name} | Авторизация успешна")
-                return True
-            else:
-                logger.error(f"{self.session_name} | Авторизация неуспешна, response: {response}")
+                if self._is_first_run:
+                    ref_id = self.get_ref_id()
+                    request_data["data"]["startParam"] = ref_id
+
+
+                # Running out of retries is transient, only an answer from the server fails the login
+                response = await self._send_api_request("/telegram/auth", request_data, api_key="empty",
+                                                         skip_relogin=True, raise_on_exhausted=True)
+
+                if response and response.get("success"):
+                    self._access_token = init_data
+                    self._request_builder.invalidate_api_key()
+                    self._response_cache.invalidate()
+                    login_span.set(authorized=True)
+                    self._journal.record("login", ok=True)
+                    logger.info(f"{self.session_name} | Авторизация успешна")
+                    return True
+                else:
+                    login_span.set(authorized=False)
+                    self._journal.record("login", ok=False)
+                    logger.error(f"{self.session_name} | Авторизация неуспешна, response: {response}")
+                    return False
+            except CYCLE_ERRORS as error:
+                login_span.set(authorized=False, error=type(error).__name__)
+                self._journal.record("login", ok=False, error=str(error))
+                raise
+            except Exception as error:
+                login_span.set(authorized=False, error=type(error).__name__)
+                self._journal.record("login", ok=False, error=str(error))
+                logger.error(f"{self.session_name} | Ошибка авторизации: {str(error)}")
                 return False
+
+    async def _invoke(self, name: str, **params) -> Optional[dict]:
+        endpoint = ENDPOINTS[name]
+        if endpoint.low_value and bandwidth_meter.over_soft_limit(self._current_proxy):
+            if DEBUG_LOGGING:
+                logger.debug(f"[{self.session_name}] Skipping {endpoint.path}: proxy traffic budget is almost used up")
+            return None
+        # The budget is enforced per action: a cycle that uses it up stops at the next request
+        self._check_bandwidth_budget()
+        try:
+            payload = endpoint.payload(**params)
+            response = await self._send_api_request(endpoint.path, payload)
+        except CYCLE_ERRORS:
+            raise
         except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка авторизации: {str(error)}")
-            return False
+            message = endpoint.error_message.format(path=endpoint.path, **params)
+            logger.error(f"{self.session_name} | {message}: {str(error)}")
+            return None
 
-    def _extract_hash_from_init_data(self, init_data: str) -> str:
-        match = re.search(r'hash=([a-f0-9]+)', init_data)
-        if match:
-            return match.group(1)
-        return ""
-    
-    def _extract_param_from_init_data(self, init_data: str, param: str) -> str:
-        from urllib.parse import unquote
-        pattern = f'{param}=([^&]+)'
-        match = re.search(pattern, init_data)
-        if match:
-            return unquote(match.group(1))
-        return ""
-    
-    def _extract_photo_url_from_init_data(self, init_data: str) -> str:
-        from urllib.parse import unquote
-        
-        user_match = re.search(r'user=([^&]+)', init_data)
-        if user_match:
-            try:
-                user_json = unquote(user_match.group(1))
-                user_data = json.loads(user_json)
-                return user_data.get('photo_url', '')
-            except:
-                pass
-        return ""
-    
-    async def _get_user_data(self) -> dict:
+        if response and response.get("success"):
+            if endpoint.success_message:
+                logger.info(f"{self.session_name} | {endpoint.success_message.format(**params)}")
+            if endpoint.path != "/user/data/all":
+                hero_updated = self._game_state.apply(response.get("data"))
+                if not hero_updated and not endpoint.cacheable and endpoint.invalidates != ():
+                    self._game_state.stale = True
+            if not endpoint.cacheable:
+                entity = endpoint.created_entity(payload)
+                finish_at = completion_time(response.get("data"), entity)
+                self._store_completion_time((endpoint.path, tuple(sorted(entity.items()))), finish_at)
+        elif endpoint.failure_message:
+            logger.warning(f"{self.session_name} | {endpoint.failure_message.format(response=response, **params)}")
+        return response
 
-        response = await self._send_api_request("/user/data/all", {"data": {}})
-        
+    async def _invoke_action(self, name: str, **params) -> bool:
+        response = await self._invoke(name, **params)
+        return bool(response and response.get("success"))
+
+    async def _get_user_data(self) -> dict:
+        response = await self._invoke("user_data")
         if not response:
             raise InvalidSession("Failed to get user data")
-            
+        if response.get("success"):
+            self._game_state = GameState.from_user_data(response.get("data", {}))
         return response
 
     async def _finish_onboarding(self, step: int) -> bool:
-        try:
-            response = await self._send_api_request("/onboarding/finish", {"data": step})
-            
-            if response and response.get("success"):
-                logger.info(f"{self.session_name} | Шаг обучения {step} завершен")
-                return True
-            else:
-                logger.warning(f"{self.session_name} | Шаг обучения {step} не завершен: {response}")
-                return False
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка на шаге {step}: {str(error)}")
-            return False
+        return await self._invoke_action("onboarding_finish", step=step)
 
     async def _select_race(self, race: str = None) -> bool:
-        try:
-            if not race:
-                race = self._get_random_race()
-            
-            response = await self._send_api_request("/race/select", {"data": race})
-            
-            if response and response.get("success"):
-                logger.info(f"{self.session_name} | Выбрана раса: {race}")
-                self._selected_race = race
-                return True
-            else:
-                logger.error(f"{self.session_name} | Ошибка выбора расы: {response}")
-                return False
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка при выборе расы: {str(error)}")
-            return False
+        race = race or self._get_random_race()
+        if await self._invoke_action("race_select", race=race):
+            self._selected_race = race
+            return True
+        return False
     
     async def _get_current_race(self) -> str:
         if hasattr(self, '_selected_race') and self._selected_race:
@@ -447,370 +599,161 @@ class FomoFightersBot(BaseBot):
         return "frog"
     
     async def _buy_building(self, position: int, building_key: str) -> bool:
-        try:
-            payload = {"data": {"position": position, "buildingKey": building_key}}
-            response = await self._send_api_request("/building/buy", payload)
-            
-            if response and response.get("success"):
-                logger.info(f"{self.session_name} | Построено здание: {building_key} на позиции {position}")
-                return True
-            else:
-                logger.warning(f"{self.session_name} | Не удалось построить {building_key}: {response}")
-                return False
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка при постройке здания: {str(error)}")
-            return False
+        return await self._invoke_action("building_buy", position=position, building_key=building_key)
     
     async def _upgrade_building(self, position: int, building_key: str) -> bool:
-        try:
-            payload = {"data": {"position": position, "buildingKey": building_key}}
-            response = await self._send_api_request("/building/buy", payload)
-            
-            if response and response.get("success"):
-                logger.info(f"{self.session_name} | Улучшено здание: {building_key} на позиции {position}")
-                return True
-            else:
-                logger.warning(f"{self.session_name} | Не удалось улучшить {building_key}: {response}")
-                return False
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка при улучшении здания: {str(error)}")
-            return False
+        return await self._invoke_action("building_upgrade", position=position, building_key=building_key)
     
     async def _claim_resources(self, resource_type: str) -> bool:
-        try:
-            response = await self._send_api_request("/resource/claim", {"data": resource_type})
-            
-            if response and response.get("success"):
-                logger.info(f"{self.session_name} | Собран ресурс: {resource_type}")
-                return True
-            else:
-                return False
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка при сборе ресурса: {str(error)}")
-            return False
+        return await self._invoke_action("resource_claim", resource_type=resource_type)
     
     async def _get_building_info(self) -> Optional[dict]:
-        try:
-            response = await self._send_api_request("/building/info", {})
-            return response
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка получения информации о зданиях: {str(error)}")
-            return None
+        return await self._invoke("building_info")
     
     async def _train_troops(self, troop_key: str, count: int) -> bool:
-        try:
-            payload = {"data": {"troopKey": troop_key, "count": count}}
-            response = await self._send_api_request("/troops/buy", payload)
-            
-            if response and response.get("success"):
-                logger.info(f"{self.session_name} | Обучено войск: {troop_key} x{count}")
-                return True
-            else:
-                logger.warning(f"{self.session_name} | Не удалось обучить войска: {response}")
-                return False
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка при обучении войск: {str(error)}")
-            return False
+        return await self._invoke_action("troops_buy", troop_key=troop_key, count=count)
     
     async def _get_troops_info(self) -> Optional[dict]:
-        try:
-            response = await self._send_api_request("/troops/info", {})
-            return response
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка получения информации о войсках: {str(error)}")
-            return None
+        return await self._invoke("troops_info")
+
+    async def _find_target(self, target_type: str) -> Optional[str]:
+        await self._get_building_info()
+        return self._game_state.find_target(target_type)
     
     async def _find_oasis_target(self) -> Optional[str]:
-        try:
-            info = await self._get_building_info()
-            if info and info.get("success"):
-                targets = info.get("data", {}).get("targets", [])
-                for target in targets:
-                    if target.get("type") == "oasis" and target.get("isCanAttack"):
-                        return target.get("id")
-            return None
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка поиска оазиса: {str(error)}")
-            return None
+        return await self._find_target("oasis")
     
     async def _find_camp_target(self) -> Optional[str]:
-        try:
-            info = await self._get_building_info()
-            if info and info.get("success"):
-                targets = info.get("data", {}).get("targets", [])
-                for target in targets:
-                    if target.get("type") == "camp" and target.get("isCanAttack"):
-                        return target.get("id")
-            return None
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка поиска лагеря: {str(error)}")
-            return None
+        return await self._find_target("camp")
     
     async def _create_attack(self, target_id: str, troops: dict) -> bool:
-        try:
-            payload = {"data": {"target": target_id, "troops": troops}}
-            response = await self._send_api_request("/attack/create", payload)
-            
-            if response and response.get("success"):
-                logger.info(f"{self.session_name} | Атака отправлена на цель: {target_id}")
-                return True
-            else:
-                logger.warning(f"{self.session_name} | Не удалось отправить атаку: {response}")
-                return False
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка при создании атаки: {str(error)}")
-            return False
+        return await self._invoke_action("attack_create", target_id=target_id, troops=troops)
     
     async def _create_scout(self, target_id: str, troops: dict) -> bool:
-        try:
-            payload = {"data": {"target": target_id, "troops": troops}}
-            response = await self._send_api_request("/attack/create/scout", payload)
-            
-            if response and response.get("success"):
-                logger.info(f"{self.session_name} | Разведка отправлена на цель: {target_id}")
-                return True
-            else:
-                logger.warning(f"{self.session_name} | Не удалось отправить разведку: {response}")
-                return False
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка при создании разведки: {str(error)}")
-            return False
+        return await self._invoke_action("scout_create", target_id=target_id, troops=troops)
     
     async def _get_attack_info(self) -> Optional[dict]:
-        try:
-            response = await self._send_api_request("/attack/info", {})
-            return response
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка получения информации об атаках: {str(error)}")
-            return None
+        return await self._invoke("attack_info")
     
     async def _claim_main_quest(self, quest_key: str) -> bool:
-        try:
-            payload = {"data": {"questKey": quest_key}}
-            response = await self._send_api_request("/quest/main/claim", payload)
-            
-            if response and response.get("success"):
-                logger.info(f"{self.session_name} | Получена награда за квест: {quest_key}")
-                return True
-            else:
-                return False
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка при получении награды за квест: {str(error)}")
-            return False
+        return await self._invoke_action("quest_main_claim", quest_key=quest_key)
     
     async def _claim_side_quest(self, quest_key: str) -> bool:
-        try:
-            response = await self._send_api_request("/quest/side/claim", {"data": quest_key})
-            
-            if response and response.get("success"):
-                logger.info(f"{self.session_name} | Получена награда за побочный квест: {quest_key}")
-                return True
-            else:
-                return False
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка при получении награды за побочный квест: {str(error)}")
-            return False
+        return await self._invoke_action("quest_side_claim", quest_key=quest_key)
     
     async def _check_tg_subscription(self) -> bool:
-        try:
-            payload = {"data": ["join_tg", None]}
-            response = await self._send_api_request("/quest/check", payload)
-            
-            if response and response.get("success"):
-                result = response.get("data", {}).get("result", False)
-                if result:
-                    logger.info(f"{self.session_name} | Подписка на TG подтверждена")
-                return result
-            return False
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка проверки подписки TG: {str(error)}")
-            return False
+        response = await self._invoke("quest_check", quest_key="join_tg")
+        if response and response.get("success"):
+            result = response.get("data", {}).get("result", False)
+            if result:
+                logger.info(f"{self.session_name} | Подписка на TG подтверждена")
+            return result
+        return False
     
     async def _claim_tg_quest(self) -> bool:
-        try:
-            payload = {"data": ["join_tg", None]}
-            response = await self._send_api_request("/quest/claim", payload)
-            
-            if response and response.get("success"):
-                logger.info(f"{self.session_name} | Получена награда за подписку на TG")
-                return True
+        return await self._invoke_action("quest_claim", quest_key="join_tg")
+
+    async def _train_race_troops(self, unit: str, count: int) -> bool:
+        race = await self._get_current_race()
+        return await self._train_troops(f"{race}_{unit}_10", count)
+
+    async def _attack_oasis(self, unit: str, count: int) -> bool:
+        target_id = await self._find_oasis_target()
+        if not target_id:
             return False
-        except Exception as error:
-            logger.error(f"{self.session_name} | Ошибка при получении награды за TG: {str(error)}")
+        race = await self._get_current_race()
+        if not await self._create_attack(target_id, {f"{race}_{unit}_10": count}):
+            return False
+        await self._wait_for_completion(ATTACK_WAIT.of(target=target_id))
+        await self._get_attack_info()
+        return True
+
+    async def _scout_camp(self, unit: str, count: int) -> bool:
+        target_id = await self._find_camp_target()
+        if not target_id:
             return False
+        race = await self._get_current_race()
+        if not await self._create_scout(target_id, {f"{race}_{unit}_10": count}):
+            return False
+        await asyncio.sleep(uniform(3, 5))
+        return True
 
-    async def _complete_tutorial(self) -> bool:
-        """Полное прохождение обучения (tutorial)"""
+    async def _claim_tg_subscription(self) -> bool:
+        if await self._check_tg_subscription():
+            return await self._claim_tg_quest()
+        return False
+
+    def _store_completion_time(self, key: Tuple[str, Tuple], finish_at: Optional[float]) -> None:
+        now = time()
+        # Timers nobody waited for are dropped once they are over
+        self._completion_times = {
+            other: other_finish for other, other_finish in self._completion_times.items() if other_finish > now
+        }
+        if finish_at is None:
+            self._completion_times.pop(key, None)
+        else:
+            self._completion_times[key] = finish_at
+
+    async def _wait_for_completion(self, wait: CompletionWait) -> None:
+        race = await self._get_current_race()
+        entity = {key: value.format(race=race) if isinstance(value, str) else value for key, value in wait.entity}
+        # Only the timer of the awaited entity counts: if the step that started it was skipped,
+        # a timer another building or troop left under the same path must not be reused
+        finish_at = self._completion_times.pop((wait.path, tuple(sorted(entity.items()))), None)
+        started = time()
+        if finish_at is None:
+            await asyncio.sleep(uniform(2, 3))
+            self._response_cache.invalidate(ENDPOINTS[wait.poll].path)
+            finish_at = completion_time((await self._invoke(wait.poll) or {}).get("data"), entity)
+
+        if finish_at is None:
+            delay = uniform(*wait.fallback) - (time() - started)
+            source = "fallback"
+        else:
+            delay = finish_at - time() + uniform(1, 2)
+            source = "server timer"
+        delay = min(max(delay, 0), wait.max_wait)
+        if DEBUG_LOGGING:
+            logger.debug(f"[{self.session_name}] Waiting {delay:.1f}s for {wait.path} ({source})")
+        await asyncio.sleep(delay)
+
+    async def _complete_tutorial(self, state: GameState) -> bool:
+        """Прохождение обучения (tutorial) с места последней остановки"""
         emoji = self.EMOJI
-        logger.info(f"{self.session_name} {emoji['info']} Начинаем прохождение обучения")
-        
+        checkpoint = read_session_state(TUTORIAL_STATE, self.session_name)
+        # A checkpoint marked finished while the server still misses the final onboarding step is
+        # stale, so the steps are taken from the server state alone
+        steps = pending_steps(state, None if checkpoint.get("finished") else checkpoint.get("step"))
+        if state.race:
+            self._selected_race = state.race
+
+        if len(steps) < len(TUTORIAL_STEPS):
+            logger.info(f"{self.session_name} {emoji['info']} Продолжаем обучение: осталось шагов {len(steps)} "
+                        f"из {len(TUTORIAL_STEPS)}")
+        else:
+            logger.info(f"{self.session_name} {emoji['info']} Начинаем прохождение обучения")
+
         try:
-            await asyncio.sleep(uniform(1, 2))
-            await self._send_api_request("/user/data/after", {"data": {"lang": "ru"}})
-            
-            await asyncio.sleep(uniform(2, 3))
-            if not await self._finish_onboarding(1):
-                return False
-            
-            await asyncio.sleep(uniform(2, 3))
-            if not await self._select_race():
-                return False
-            
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10000)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10010)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10020)
-            
-            await asyncio.sleep(uniform(2, 3))
-            if not await self._buy_building(2, "farm_1"):
-                logger.warning(f"{self.session_name} Не удалось построить ферму")
-            
-            await asyncio.sleep(uniform(2, 3))
-            if not await self._buy_building(3, "lumber_mill_1"):
-                logger.warning(f"{self.session_name} Не удалось построить лесопилку")
-            
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10050)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10060)
-            
-            await asyncio.sleep(uniform(2, 3))
-            await self._claim_resources("wood")
-            await asyncio.sleep(uniform(1, 2))
-            await self._claim_resources("food")
-            
-            await asyncio.sleep(uniform(2, 3))
-            if not await self._upgrade_building(1, "castle"):
-                logger.warning(f"{self.session_name} Не удалось улучшить замок до 2 уровня")
-            
-            await asyncio.sleep(uniform(2, 3))
-            await self._get_building_info()
-            
-            await asyncio.sleep(uniform(1, 2))
-            await self._claim_main_quest("build_castle_2")
-            
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10100)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10110)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10120)
-            
-            await asyncio.sleep(uniform(2, 3))
-            if not await self._buy_building(4, "archery_range"):
-                logger.warning(f"{self.session_name} Не удалось построить стрельбище")
-            
-            await asyncio.sleep(uniform(2, 3))
-            race = await self._get_current_race()
-            troop_key = f"{race}_archer_10" if race else "frog_archer_10"
-            if not await self._train_troops(troop_key, 5):
-                logger.warning(f"{self.session_name} Не удалось обучить лучников")
-            
-            await asyncio.sleep(uniform(1, 2))
-            await self._get_troops_info()
-            
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10150)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10160)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10170)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10180)
-            
-            await asyncio.sleep(uniform(2, 3))
-            target_id = await self._find_oasis_target()
-            if target_id:
-                troops = {troop_key: 5}
-                if await self._create_attack(target_id, troops):
-                    await asyncio.sleep(uniform(5, 8))
-                    await self._get_attack_info()
-            
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10210)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10220)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10230)
-            
-            await asyncio.sleep(uniform(2, 3))
-            if not await self._buy_building(5, "scout_camp"):
-                logger.warning(f"{self.session_name} Не удалось построить лагерь разведчиков")
-            
-            await asyncio.sleep(uniform(2, 3))
-            scout_key = f"{race}_scout_10" if race else "frog_scout_10"
-            if not await self._train_troops(scout_key, 1):
-                logger.warning(f"{self.session_name} Не удалось обучить разведчика")
-            
-            await asyncio.sleep(uniform(25, 30))
-            
-            camp_target_id = await self._find_camp_target()
-            if camp_target_id:
-                scout_troops = {scout_key: 1}
-                if await self._create_scout(camp_target_id, scout_troops):
-                    await asyncio.sleep(uniform(3, 5))
-            
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10280)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10290)
-            
-            await asyncio.sleep(uniform(2, 3))
-            if not await self._buy_building(6, "storage"):
-                logger.warning(f"{self.session_name} Не удалось построить склад")
-            
-            await asyncio.sleep(uniform(1, 2))
-            await self._claim_main_quest("build_archery_range_1")
-            await asyncio.sleep(uniform(1, 2))
-            await self._claim_main_quest("trainTotal_5")
-            await asyncio.sleep(uniform(1, 2))
-            await self._claim_main_quest("attack_oasis_1")
-            await asyncio.sleep(uniform(1, 2))
-            await self._claim_main_quest("build_scout_camp_1")
-            await asyncio.sleep(uniform(1, 2))
-            await self._claim_main_quest("attack_camp_1")
-            
-            await asyncio.sleep(uniform(1, 2))
-            await self._claim_side_quest("attack_oasis")
-            await asyncio.sleep(uniform(1, 2))
-            await self._claim_side_quest("resourceLoot_wood")
-            await asyncio.sleep(uniform(1, 2))
-            await self._claim_side_quest("attack_camp")
-            
-            await asyncio.sleep(uniform(2, 3))
-            if not await self._upgrade_building(1, "castle"):
-                logger.warning(f"{self.session_name} Не удалось улучшить замок до 3 уровня")
-            
-            await asyncio.sleep(uniform(60, 65))
-            
-            await asyncio.sleep(uniform(1, 2))
-            await self._claim_main_quest("build_castle_3")
-            
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10340)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10350)
-            
-            await asyncio.sleep(uniform(2, 3))
-            if await self._check_tg_subscription():
-                await self._claim_tg_quest()
-            
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10360)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10370)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10380)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10390)
-            await asyncio.sleep(uniform(1, 2))
-            await self._finish_onboarding(10400)
-            
+            for step in steps:
+                await asyncio.sleep(uniform(*step.delay))
+                if step.wait:
+                    await self._wait_for_completion(step.wait)
+                if DEBUG_LOGGING:
+                    logger.debug(f"[{self.session_name}] Tutorial step: {step.key}")
+                result = await getattr(self, step.action)(**step.params)
+                self._journal.record("tutorial_step", step=step.key, ok=bool(result))
+                if not result and step.required:
+                    logger.error(f"{self.session_name} {emoji['error']} Обязательный шаг обучения {step.key} не выполнен")
+                    return False
+                await write_session_state(TUTORIAL_STATE, self.session_name, {"step": step.key, "finished": False})
+
+            await write_session_state(TUTORIAL_STATE, self.session_name,
+                                      {"step": TUTORIAL_STEPS[-1].key, "finished": True})
             logger.info(f"{self.session_name} {emoji['success']} Обучение успешно завершено!")
             return True
             
+        except CYCLE_ERRORS:
+            raise
         except Exception as error:
             logger.error(f"{self.session_name} {emoji['error']} Ошибка при прохождении обучения: {error}")
             return False
@@ -825,48 +768,46 @@ class FomoFightersBot(BaseBot):
             await asyncio.sleep(60)
             return
 
-        data = user_data.get("data", {})
-        profile = data.get("profile", {})
-        hero = data.get("hero", {})
-        resources = hero.get("resources", {})
-        
-        race = hero.get("race")
-        onboarding = hero.get("onboarding", [])
-        
-        if not race or len(onboarding) == 0:
-            logger.info(f"{self.session_name} {emoji['warning']} Обнаружен новый аккаунт, начинаем полное обучение")
-            if not await self._complete_tutorial():
+        state = self._game_state
+        tutorial_pending = is_tutorial_pending(state)
+        self._record_fleet_snapshot(state, tutorial_done=not tutorial_pending)
+
+        if tutorial_pending:
+            logger.info(f"{self.session_name} {emoji['warning']} Обучение не завершено, запускаем обучение")
+            set_session_state(self.session_name, "tutorial")
+            if not await self._complete_tutorial(state):
                 logger.error(f"{self.session_name} {emoji['error']} Не удалось завершить обучение")
                 await asyncio.sleep(300)
                 return
             
-            user_data = await self._get_user_data()
-            if not user_data or not user_data.get("success"):
-                logger.error(f"{self.session_name} | Не удалось получить данные после обучения")
-                await asyncio.sleep(60)
-                return
-            data = user_data.get("data", {})
-            profile = data.get("profile", {})
-            hero = data.get("hero", {})
-            resources = hero.get("resources", {})
-        
-        public_name = profile.get("publicName", "Unknown")
-        level = hero.get("level", 0)
-        power = hero.get("power", 0)
-        race = hero.get("race", "Unknown")
-        
-        food = resources.get("food", {}).get("value", 0)
-        wood = resources.get("wood", {}).get("value", 0)
-        stone = resources.get("stone", {}).get("value", 0)
-        gem = resources.get("gem", {}).get("value", 0)
+            if state.stale:
+                user_data = await self._get_user_data()
+                if not user_data or not user_data.get("success"):
+                    logger.error(f"{self.session_name} | Не удалось получить данные после обучения")
+                    await asyncio.sleep(60)
+                    return
+                state = self._game_state
+                self._record_fleet_snapshot(state, tutorial_done=True)
         
-        logger.info(f"{self.session_name} {emoji['info']} Игрок: {public_name} | Раса: {race}")
-        logger.info(f"{self.session_name} {emoji['info']} Уровень: {level} | Мощь: {power}")
-        logger.info(f"{self.session_name} {emoji['info']} Ресурсы - Еда: {food}, Дерево: {wood}, Камень: {stone}, Гемы: {gem}")
+        hero = state.hero
+        logger.info(f"{self.session_name} {emoji['info']} Игрок: {state.public_name} | Раса: {hero.race or 'Unknown'}")
+        logger.info(f"{self.session_name} {emoji['info']} Уровень: {hero.level} | Мощь: {hero.power}")
+        logger.info(f"{self.session_name} {emoji['info']} Ресурсы - Еда: {hero.resource('food')}, "
+                    f"Дерево: {hero.resource('wood')}, Камень: {hero.resource('stone')}, Гемы: {hero.resource('gem')}")
+        self._journal.record("snapshot", level=hero.level, power=hero.power,
+                             resources={name: hero.resource(name) for name in ("food", "wood", "stone", "gem")})
         
-        sleep_time = uniform(3600, 7200)
+        sleep_time = uniform(max(settings.MIN_SLEEP_TIME, settings.MAX_SLEEP_TIME / 2), settings.MAX_SLEEP_TIME)
+        next_event = state.next_event()
+        if next_event is not None:
+            # Jitter goes in before the clamp so the sleep stays within MIN_SLEEP_TIME..MAX_SLEEP_TIME
+            sleep_time = next_event - time() + uniform(5, 60)
+            sleep_time = min(max(sleep_time, settings.MIN_SLEEP_TIME), settings.MAX_SLEEP_TIME)
         logger.info(f"{self.session_name} | Засыпаем на {int(sleep_time)} сек до следующей проверки")
-        await asyncio.sleep(sleep_time)
+        set_session_state(self.session_name, "sleeping")
+        await self._journal.flush()
+        with span("sleep", seconds=int(sleep_time)):
+            await asyncio.sleep(sleep_time)
 
 async def run_tapper(tg_client: UniversalTelegramClient):
     bot = FomoFightersBot(tg_client=tg_client)
@@ -0,0 +1,152 @@
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, List, Optional, Tuple
+
+from bot.core.game_state import GameState
+
+TUTORIAL_STATE = "tutorial"
+FINAL_ONBOARDING_STEP = 10400
+
+
+@dataclass(frozen=True)
+class CompletionWait:
+    path: str
+    poll: str
+    fallback: Tuple[float, float]
+    max_wait: float
+    # Request fields of the awaited building, troop or attack, "{race}" stands for the account's race
+    entity: Tuple[Tuple[str, Any], ...] = ()
+
+    def of(self, **entity) -> 'CompletionWait':
+        return replace(self, entity=tuple(sorted(entity.items())))
+
+
+TRAINING_WAIT = CompletionWait(path="/troops/buy", poll="troops_info", fallback=(25, 30), max_wait=120)
+UPGRADE_WAIT = CompletionWait(path="/building/buy", poll="building_info", fallback=(60, 65), max_wait=300)
+ATTACK_WAIT = CompletionWait(path="/attack/create", poll="attack_info", fallback=(5, 8), max_wait=15)
+
+
+@dataclass(frozen=True)
+class TutorialStep:
+    key: str
+    action: str
+    params: dict = field(default_factory=dict)
+    delay: Tuple[float, float] = (1, 2)
+    required: bool = False
+    done: Optional[Callable[[GameState], bool]] = None
+    wait: Optional[CompletionWait] = None
+
+
+def _onboarding(step: int, delay: Tuple[float, float] = (1, 2), required: bool = False) -> TutorialStep:
+    return TutorialStep(
+        key=f"onboarding_{step}",
+        action="_finish_onboarding",
+        params={"step": step},
+        delay=delay,
+        required=required,
+        done=lambda state: step in state.onboarding,
+    )
+
+
+def _build(position: int, building_key: str, level: int = 1) -> TutorialStep:
+    action = "_buy_building" if level == 1 else "_upgrade_building"
+    return TutorialStep(
+        key=f"build_{building_key}_{level}",
+        action=action,
+        params={"position": position, "building_key": building_key},
+        delay=(2, 3),
+        done=lambda state: state.has_building(position, level),
+    )
+
+
+def _main_quest(quest_key: str, wait: Optional[CompletionWait] = None) -> TutorialStep:
+    return TutorialStep(
+        key=f"main_quest_{quest_key}",
+        action="_claim_main_quest",
+        params={"quest_key": quest_key},
+        done=lambda state: quest_key in state.quests,
+        wait=wait,
+    )
+
+
+def _side_quest(quest_key: str) -> TutorialStep:
+    return TutorialStep(
+        key=f"side_quest_{quest_key}",
+        action="_claim_side_quest",
+        params={"quest_key": quest_key},
+        done=lambda state: quest_key in state.quests,
+    )
+
+
+TUTORIAL_STEPS: List[TutorialStep] = [
+    TutorialStep(key="user_data_after", action="_invoke", params={"name": "user_data_after", "lang": "ru"}),
+    _onboarding(1, delay=(2, 3), required=True),
+    TutorialStep(key="select_race", action="_select_race", delay=(2, 3), required=True,
+                 done=lambda state: bool(state.race)),
+    _onboarding(10000),
+    _onboarding(10010),
+    _onboarding(10020),
+    _build(2, "farm_1"),
+    _build(3, "lumber_mill_1"),
+    _onboarding(10050),
+    _onboarding(10060),
+    TutorialStep(key="claim_wood", action="_claim_resources", params={"resource_type": "wood"}, delay=(2, 3)),
+    TutorialStep(key="claim_food", action="_claim_resources", params={"resource_type": "food"}),
+    _build(1, "castle", level=2),
+    TutorialStep(key="building_info", action="_get_building_info", delay=(2, 3)),
+    _main_quest("build_castle_2"),
+    _onboarding(10100),
+    _onboarding(10110),
+    _onboarding(10120),
+    _build(4, "archery_range"),
+    TutorialStep(key="train_archers", action="_train_race_troops", params={"unit": "archer", "count": 5},
+                 delay=(2, 3)),
+    TutorialStep(key="troops_info", action="_get_troops_info"),
+    _onboarding(10150),
+    _onboarding(10160),
+    _onboarding(10170),
+    _onboarding(10180),
+    TutorialStep(key="attack_oasis", action="_attack_oasis", params={"unit": "archer", "count": 5}, delay=(2, 3)),
+    _onboarding(10210),
+    _onboarding(10220),
+    _onboarding(10230),
+    _build(5, "scout_camp"),
+    TutorialStep(key="train_scout", action="_train_race_troops", params={"unit": "scout", "count": 1},
+                 delay=(2, 3)),
+    TutorialStep(key="scout_camp", action="_scout_camp", params={"unit": "scout", "count": 1},
+                 wait=TRAINING_WAIT.of(troopKey="{race}_scout_10")),
+    _onboarding(10280),
+    _onboarding(10290),
+    _build(6, "storage"),
+    _main_quest("build_archery_range_1"),
+    _main_quest("trainTotal_5"),
+    _main_quest("attack_oasis_1"),
+    _main_quest("build_scout_camp_1"),
+    _main_quest("attack_camp_1"),
+    _side_quest("attack_oasis"),
+    _side_quest("resourceLoot_wood"),
+    _side_quest("attack_camp"),
+    _build(1, "castle", level=3),
+    _main_quest("build_castle_3", wait=UPGRADE_WAIT.of(position=1)),
+    _onboarding(10340),
+    _onboarding(10350),
+    TutorialStep(key="tg_subscription", action="_claim_tg_subscription", delay=(2, 3)),
+    _onboarding(10360),
+    _onboarding(10370),
+    _onboarding(10380),
+    _onboarding(10390),
+    _onboarding(FINAL_ONBOARDING_STEP),
+]
+
+
+def pending_steps(state: GameState, checkpoint: Optional[str] = None) -> List[TutorialStep]:
+    start = 0
+    step_keys = [step.key for step in TUTORIAL_STEPS]
+    if checkpoint in step_keys:
+        start = step_keys.index(checkpoint) + 1
+    return [step for step in TUTORIAL_STEPS[start:] if not (step.done and step.done(state))]
+
+
+def is_tutorial_pending(state: GameState) -> bool:
+    # The server's onboarding list is the source of truth: an account interrupted mid-tutorial
+    # already has a race and some steps, and the local checkpoint only picks where to resume
+    return FINAL_ONBOARDING_STEP not in state.onboarding
@@ -2,4 +2,21 @@ class InvalidSession(Exception):
     pass
 
 class AdViewError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class CircuitOpenError(Exception):
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Circuit for {host} is open, retry in {int(retry_in)}s")
+        self.host = host
+        self.retry_in = retry_in
+
+class BandwidthBudgetExceeded(Exception):
+    def __init__(self, proxy: str, retry_in: float):
+        super().__init__(f"Daily traffic budget for proxy {proxy} is used up, retry in {int(retry_in)}s")
+        self.proxy = proxy
+        self.retry_in = retry_in
+
+class RetryBudgetExhausted(Exception):
+    def __init__(self, url: str, failure: str):
+        super().__init__(f"Retry budget exhausted on {url} ({failure})")
+        self.url = url
@@ -2,7 +2,7 @@ import os
 
 from .logger import logger, log_error
 from .async_lock import AsyncInterProcessLock
-from . import proxy_utils, config_utils, first_run
+from . import json_codec, proxy_utils, config_utils, first_run
 from bot.config import settings
 
 if not os.path.isdir(settings.GLOBAL_CONFIG_PATH):
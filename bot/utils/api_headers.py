@@ -1,9 +1,10 @@
 import hashlib
-import json
 import time
 from typing import Optional
 from urllib.parse import quote
 
+from bot.utils.json_codec import dumps_signed
+
 def get_headers(
     api_key: str,
     payload: Optional[dict] = None
@@ -11,7 +12,7 @@ def get_headers(
     timestamp = int(time.time())
     
     if payload:
-        body_string = json.dumps(payload, separators=(',', ':'))
+        body_string = dumps_signed(payload)
     else:
         body_string = ""
     
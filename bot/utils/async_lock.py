@@ -2,27 +2,41 @@ import asyncio
 import fasteners
 from random import uniform
 from os import path
+from time import monotonic
 
 from bot.utils import logger
+from bot.utils.metrics import LOCK_HOLD, LOCK_RETRIES, LOCK_WAIT
+from bot.utils.tracing import span
 
 class AsyncInterProcessLock:
     def __init__(self, lock_file: str):
         self._lock = fasteners.InterProcessLock(lock_file)
         self._file_name, _ = path.splitext(path.basename(lock_file))
+        self._metric_name = 'accounts_config' if 'accounts_config' in self._file_name else 'session'
+        self._acquired_at = 0.0
 
     async def __aenter__(self) -> 'AsyncInterProcessLock':
-        while True:
-            lock_acquired = await asyncio.to_thread(self._lock.acquire, timeout=uniform(5, 10))
-            if lock_acquired:
-                return self
-            sleep_time = uniform(30, 150)
-            logger_message = (
-                f"<LY><k>{self._file_name}</k></LY> | Failed to acquire lock for "
-                f"{'accounts_config' if 'accounts_config' in self._file_name else 'session'}. "
-                f"Retrying in {int(sleep_time)} seconds"
-            )
-            logger.info(logger_message)
-            await asyncio.sleep(sleep_time)
+        started = monotonic()
+        retries = 0
+        with span("lock.wait", lock=self._metric_name) as wait_span:
+            while True:
+                lock_acquired = await asyncio.to_thread(self._lock.acquire, timeout=uniform(5, 10))
+                if lock_acquired:
+                    self._acquired_at = monotonic()
+                    LOCK_WAIT.observe(self._acquired_at - started, lock=self._metric_name)
+                    wait_span.set(retries=retries)
+                    return self
+                retries += 1
+                LOCK_RETRIES.inc(lock=self._metric_name)
+                sleep_time = uniform(30, 150)
+                logger_message = (
+                    f"<LY><k>{self._file_name}</k></LY> | Failed to acquire lock for "
+                    f"{self._metric_name}. "
+                    f"Retrying in {int(sleep_time)} seconds"
+                )
+                logger.info(logger_message)
+                await asyncio.sleep(sleep_time)
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
-        await asyncio.to_thread(self._lock.release)
\ No newline at end of file
+        await asyncio.to_thread(self._lock.release)
+        LOCK_HOLD.observe(monotonic() - self._acquired_at, lock=self._metric_name)
\ No newline at end of file
@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta, timezone
+from time import monotonic
+from types import SimpleNamespace
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+from yarl import URL
+
+from bot.config import settings
+from bot.utils import logger
+from bot.utils.metrics import registry, endpoint_label
+from bot.utils.session_state import read_session_state, write_session_state
+
+BANDWIDTH_STATE = "bandwidth"
+DAILY_TOTALS = "daily_totals"
+PERSIST_INTERVAL = 60
+# Request line / status line and the blank line after the headers
+LINE_OVERHEAD = 16
+MEGABYTE = 1024 * 1024
+
+
+def proxy_label(proxy: Optional[str]) -> str:
+    if not proxy:
+        return "direct"
+    url = URL(proxy)
+    return f"{url.host}:{url.port}" if url.host else proxy
+
+
+def _headers_size(headers) -> int:
+    return sum(len(key) + len(value) + 4 for key, value in headers.items()) + LINE_OVERHEAD
+
+
+def _raw_headers_size(raw_headers) -> int:
+    return sum(len(key) + len(value) + 4 for key, value in raw_headers) + LINE_OVERHEAD
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class TrafficCounter:
+    __slots__ = ("requests", "sent", "received", "compressed")
+
+    def __init__(self):
+        self.requests = 0
+        self.sent = 0
+        self.received = 0
+        self.compressed = 0
+
+
+class BandwidthMeter:
+    """Counts HTTP bytes per session, proxy and endpoint and enforces daily per-proxy budgets.
+
+    Bytes are collected from aiohttp trace hooks, so redirects and Cloudflare challenge requests
+    made inside CloudflareScraper are counted too. Response bodies use Content-Length, which is
+    the size on the wire for compressed responses; without it the decoded body size is counted.
+    """
+
+    def __init__(self):
+        self.counters: Dict[Tuple[str, str, str], TrafficCounter] = {}
+        self._day = _today()
+        self._daily: Dict[str, int] = {}
+        self._last_persist = monotonic()
+        self._loaded = False
+
+    def _load(self) -> None:
+        self._loaded = True
+        state = read_session_state(BANDWIDTH_STATE, DAILY_TOTALS)
+        if state.get("day") == self._day and isinstance(state.get("proxies"), dict):
+            for proxy, used in state["proxies"].items():
+                self._daily[proxy] = self._daily.get(proxy, 0) + int(used)
+
+    def _roll_day(self) -> None:
+        if not self._loaded:
+            self._load()
+        today = _today()
+        if today != self._day:
+            self._day = today
+            self._daily.clear()
+
+    def record(self, session_name: str, proxy: str, endpoint: str, sent: int = 0, received: int = 0,
+               compressed: bool = False, new_request: bool = False) -> None:
+        counter = self.counters.get((session_name, proxy, endpoint))
+        if counter is None:
+            counter = self.counters[(session_name, proxy, endpoint)] = TrafficCounter()
+        counter.requests += new_request
+        counter.sent += sent
+        counter.received += received
+        counter.compressed += compressed
+
+        self._roll_day()
+        self._daily[proxy] = self._daily.get(proxy, 0) + sent + received
+
+    def daily_totals(self) -> Dict[str, int]:
+        self._roll_day()
+        return dict(self._daily)
+
+    def used_today(self, proxy: Optional[str]) -> int:
+        self._roll_day()
+        return self._daily.get(proxy_label(proxy), 0)
+
+    @staticmethod
+    def daily_budget() -> int:
+        return int(settings.PROXY_DAILY_BUDGET_MB * MEGABYTE)
+
+    def over_soft_limit(self, proxy: Optional[str]) -> bool:
+        budget = self.daily_budget()
+        return budget > 0 and self.used_today(proxy) >= budget * settings.PROXY_BUDGET_SOFT_LIMIT
+
+    def is_exhausted(self, proxy: Optional[str]) -> bool:
+        budget = self.daily_budget()
+        return budget > 0 and self.used_today(proxy) >= budget
+
+    @staticmethod
+    def seconds_until_reset() -> float:
+        now = datetime.now(timezone.utc)
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+        return (midnight - now).total_seconds()
+
+    async def persist(self, force: bool = False) -> None:
+        if not force and monotonic() - self._last_persist < PERSIST_INTERVAL:
+            return
+        self._last_persist = monotonic()
+        try:
+            await write_session_state(BANDWIDTH_STATE, DAILY_TOTALS, {"day": self._day, "proxies": self._daily})
+        except OSError as error:
+            logger.warning(f"Failed to save bandwidth totals: {error}")
+
+    def trace_config(self, session_name: str, proxy: Optional[str],
+                     api_host: Optional[str] = None) -> aiohttp.TraceConfig:
+        label = proxy_label(proxy)
+        meter = self
+
+        async def on_request_start(session, context: SimpleNamespace, params) -> None:
+            context.bandwidth_key = endpoint_label(params.url, api_host)
+            context.body_counted = False
+
+        async def on_request_headers_sent(session, context: SimpleNamespace, params) -> None:
+            meter.record(session_name, label, context.bandwidth_key, sent=_headers_size(params.headers),
+                         new_request=True)
+
+        async def on_request_chunk_sent(session, context: SimpleNamespace, params) -> None:
+            meter.record(session_name, label, context.bandwidth_key, sent=len(params.chunk))
+
+        async def on_response(session, context: SimpleNamespace, params) -> None:
+            response = params.response
+            received = _raw_headers_size(response.raw_headers)
+            content_length = response.headers.get("Content-Length", "")
+            if content_length.isdigit():
+                received += int(content_length)
+                context.body_counted = True
+            meter.record(session_name, label, context.bandwidth_key, received=received,
+                         compressed="Content-Encoding" in response.headers)
+            await meter.persist()
+
+        async def on_response_chunk_received(session, context: SimpleNamespace, params) -> None:
+            if not context.body_counted:
+                meter.record(session_name, label, context.bandwidth_key, received=len(params.chunk))
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_headers_sent.append(on_request_headers_sent)
+        trace_config.on_request_chunk_sent.append(on_request_chunk_sent)
+        trace_config.on_request_redirect.append(on_response)
+        trace_config.on_request_end.append(on_response)
+        trace_config.on_response_chunk_received.append(on_response_chunk_received)
+        return trace_config
+
+    def summary(self, session_name: Optional[str] = None) -> Dict[str, int]:
+        totals = {"requests": 0, "sent": 0, "received": 0, "compressed": 0}
+        for (session, _, _), counter in self.counters.items():
+            if session_name is None or session == session_name:
+                for field in totals:
+                    totals[field] += getattr(counter, field)
+        return totals
+
+
+bandwidth_meter = BandwidthMeter()
+
+
+def _traffic_samples() -> Dict[Tuple[str, ...], float]:
+    samples = {}
+    for (session_name, proxy, endpoint), counter in bandwidth_meter.counters.items():
+        samples[(session_name, proxy, endpoint, "sent")] = counter.sent
+        samples[(session_name, proxy, endpoint, "received")] = counter.received
+    return samples
+
+
+registry.counter("fomo_http_traffic_bytes", "HTTP bytes by session, proxy and endpoint.",
+                 ("session", "proxy", "endpoint", "direction"), collect=_traffic_samples)
+registry.gauge("fomo_proxy_traffic_today_bytes", "HTTP bytes sent and received through each proxy today (UTC).",
+               ("proxy",), collect=lambda: {(proxy,): used for proxy, used in bandwidth_meter.daily_totals().items()})
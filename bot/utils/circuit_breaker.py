@@ -0,0 +1,103 @@
+from enum import Enum
+from time import monotonic
+from typing import Dict
+
+from bot.config import settings
+from bot.exceptions import CircuitOpenError
+from bot.utils import logger
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, host: str, failure_threshold: int, recovery_timeout: float, half_open_probes: int):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_probes = half_open_probes
+        self.state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._open_timeout = recovery_timeout
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    def _set_state(self, state: CircuitState) -> None:
+        if state is self.state:
+            return
+        logger.warning(f"API host {self.host} circuit: {self.state.value} -> {state.value}")
+        self.state = state
+
+    def retry_in(self) -> float:
+        if self.state is CircuitState.OPEN:
+            return max(0.0, self._opened_at + self._open_timeout - monotonic())
+        if self.state is CircuitState.HALF_OPEN:
+            return self.recovery_timeout / 4
+        return 0.0
+
+    def check_available(self) -> None:
+        """Raise where check() would, without taking a half-open probe slot."""
+        if self.state is CircuitState.OPEN and self.retry_in() > 0:
+            raise CircuitOpenError(self.host, self.retry_in())
+        if self.state is CircuitState.HALF_OPEN and self._probes_in_flight >= self.half_open_probes:
+            raise CircuitOpenError(self.host, self.retry_in())
+
+    def check(self) -> None:
+        if self.state is CircuitState.OPEN:
+            if self.retry_in() > 0:
+                raise CircuitOpenError(self.host, self.retry_in())
+            self._set_state(CircuitState.HALF_OPEN)
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+
+        if self.state is CircuitState.HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                raise CircuitOpenError(self.host, self.retry_in())
+            self._probes_in_flight += 1
+
+    def _open(self) -> None:
+        if self.state is CircuitState.HALF_OPEN:
+            self._open_timeout = min(self._open_timeout * 2, self.recovery_timeout * 10)
+        else:
+            self._open_timeout = self.recovery_timeout
+        self._opened_at = monotonic()
+        self._set_state(CircuitState.OPEN)
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self.state is CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self._set_state(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        if self.state is CircuitState.HALF_OPEN:
+            self._open()
+            return
+        self._failures += 1
+        if self.state is CircuitState.CLOSED and self._failures >= self.failure_threshold:
+            self._open()
+
+    def release(self) -> None:
+        if self.state is CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers[host] = CircuitBreaker(
+            host,
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=settings.CIRCUIT_RECOVERY_TIMEOUT,
+            half_open_probes=settings.CIRCUIT_HALF_OPEN_PROBES,
+        )
+    return breaker
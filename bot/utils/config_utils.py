@@ -1,15 +1,14 @@
 import asyncio
-import json
-from bot.utils import logger, log_error, AsyncInterProcessLock
+from bot.utils import logger, log_error, AsyncInterProcessLock, json_codec
 from opentele.api import API
 from os import path, remove
 from copy import deepcopy
 
 def read_config_file(config_path: str) -> dict:
     try:
-        with open(config_path, 'r') as file:
+        with open(config_path, 'r', encoding='utf-8') as file:
             content = file.read()
-            return json.loads(content) if content else {}
+            return json_codec.loads(content) if content else {}
     except FileNotFoundError:
         with open(config_path, 'w'):
             logger.warning(f"Accounts config file `{config_path}` not found. Creating a new one.")
@@ -18,8 +17,8 @@ def read_config_file(config_path: str) -> dict:
 async def write_config_file(content: dict, config_path: str) -> None:
     lock = AsyncInterProcessLock(path.join(path.dirname(config_path), 'lock_files', 'accounts_config.lock'))
     async with lock:
-        with open(config_path, 'w+') as file:
-            json.dump(content, file, indent=2)
+        with open(config_path, 'w+', encoding='utf-8') as file:
+            file.write(json_codec.dumps(content, indent=True))
         await asyncio.sleep(0.1)
 
 def get_session_config(session_name: str, config_path: str) -> dict:
@@ -60,8 +59,8 @@ def import_session_json(session_path: str) -> dict:
     }
     json_path = f"{session_path.replace('.session', '')}.json"
     if path.isfile(json_path):
-        with open(json_path, 'r') as file:
-            json_conf = json.loads(file.read())
+        with open(json_path, 'r', encoding='utf-8') as file:
+            json_conf = json_codec.loads(file.read())
         api = {
             'api_id': int(json_conf.get('app_id')),
             'api_hash': json_conf.get('app_hash'),
@@ -0,0 +1,74 @@
+from email.utils import formatdate
+from http.cookies import Morsel
+from time import time
+from typing import Iterable, List, Optional, Tuple
+
+from aiohttp import CookieJar
+from aiohttp.abc import AbstractCookieJar
+from yarl import URL
+
+from bot.utils.session_state import read_session_state, write_session_state
+
+COOKIE_STATE = "cookies"
+MORSEL_FLAGS = ("secure", "httponly")
+
+
+def dump_cookies(jar: CookieJar) -> List[dict]:
+    """Cookies of the jar as they were received, the jar itself is left untouched.
+
+    aiohttp keeps the absolute expiry it computed from max-age or expires when the cookie
+    arrived and the host-only flag only on the jar, so both are read from there.
+    """
+    expirations = getattr(jar, "_expirations", {})
+    host_only = getattr(jar, "_host_only_cookies", set())
+    cookies = []
+    for morsel in jar:
+        domain, path = morsel["domain"], morsel["path"] or "/"
+        cookie = {
+            "name": morsel.key,
+            "value": morsel.value,
+            "domain": domain,
+            "path": path,
+            "expires_at": expirations.get((domain, path, morsel.key)),
+        }
+        if (domain, morsel.key) in host_only:
+            cookie["host_only"] = True
+        cookie.update({flag: True for flag in MORSEL_FLAGS if morsel[flag]})
+        cookies.append(cookie)
+    return cookies
+
+
+def restore_cookies(jar: AbstractCookieJar, cookies: Iterable[dict], now: Optional[float] = None) -> List[str]:
+    now = time() if now is None else now
+    restored = []
+    for cookie in cookies:
+        expires_at = cookie.get("expires_at")
+        if not cookie.get("name") or not cookie.get("domain") or (expires_at is not None and expires_at <= now):
+            continue
+        morsel = Morsel()
+        morsel.set(cookie["name"], cookie.get("value", ""), cookie.get("value", ""))
+        # Without a domain attribute the jar scopes the cookie to the host it came from, as on receipt
+        if not cookie.get("host_only"):
+            morsel["domain"] = cookie["domain"]
+        morsel["path"] = cookie.get("path", "/")
+        if expires_at is not None:
+            morsel["expires"] = formatdate(expires_at, usegmt=True)
+        for flag in MORSEL_FLAGS:
+            if cookie.get(flag):
+                morsel[flag] = True
+        jar.update_cookies({morsel.key: morsel}, URL.build(scheme="https", host=cookie["domain"]))
+        restored.append(morsel.key)
+    return restored
+
+
+def cookies_fingerprint(cookies: Iterable[dict]) -> Tuple:
+    return tuple(sorted((cookie["domain"], cookie["path"], cookie["name"], cookie["value"]) for cookie in cookies))
+
+
+def load_cookies(session_name: str) -> List[dict]:
+    cookies = read_session_state(COOKIE_STATE, session_name).get("cookies")
+    return cookies if isinstance(cookies, list) else []
+
+
+async def save_cookies(session_name: str, cookies: List[dict]) -> None:
+    await write_session_state(COOKIE_STATE, session_name, {"cookies": cookies})
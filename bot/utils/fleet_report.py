@@ -0,0 +1,107 @@
+import argparse
+import sys
+from time import time
+from typing import TYPE_CHECKING
+
+from bot.config import settings
+from bot.utils.fleet_store import RESOURCES, connect
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_STUCK_HOURS = 24
+
+
+def load_snapshots(db_path: str, hours: float = 0) -> 'pd.DataFrame':
+    """Snapshots ordered by session and time, ``hours`` limits them to the most recent ones."""
+    import pandas as pd
+
+    query = f"SELECT ts, session_id, level, power, {', '.join(RESOURCES)}, tutorial_done FROM snapshots"
+    params = ()
+    # A full read is a sequential scan, the ts index only pays off for a recent window.
+    # Rows are sorted by pandas, an ORDER BY in SQLite is several times slower
+    if hours > 0:
+        query += " WHERE ts >= ?"
+        params = (int(time() - hours * 3600),)
+    connection = connect(db_path)
+    try:
+        frame = pd.read_sql_query(query, connection, params=params)
+        names = pd.read_sql_query("SELECT id, name FROM sessions", connection).set_index("id")["name"]
+    finally:
+        connection.close()
+    frame = frame.sort_values(["session_id", "ts"], kind="stable", ignore_index=True)
+    frame["session"] = frame["session_id"].map(names).astype("category")
+    return frame
+
+
+def resources_per_hour(frame: 'pd.DataFrame') -> 'pd.DataFrame':
+    """Resources produced per hour by the whole fleet and by a median account.
+
+    Only increases between consecutive snapshots of a session count, so spending on
+    buildings and troops does not cancel out production.
+    """
+    import pandas as pd
+
+    grouped = frame.groupby("session_id", sort=False)
+    gained = grouped[list(RESOURCES)].diff().clip(lower=0).groupby(frame["session_id"]).sum()
+    hours = (grouped["ts"].max() - grouped["ts"].min()) / 3600
+    observed = hours > 0
+    per_account = gained[observed].div(hours[observed], axis=0)
+    fleet_hours = (frame["ts"].max() - frame["ts"].min()) / 3600 if len(frame) else 0
+    return pd.DataFrame({
+        "fleet per hour": gained.sum() / fleet_hours if fleet_hours else 0.0,
+        "median account per hour": per_account.median(),
+    }).round(1)
+
+
+def latest_snapshots(frame: 'pd.DataFrame') -> 'pd.DataFrame':
+    return frame.drop_duplicates("session_id", keep="last").set_index("session_id")
+
+
+def tutorial_completion(latest: 'pd.DataFrame') -> float:
+    return float(latest["tutorial_done"].mean()) if len(latest) else 0.0
+
+
+def stuck_by_level(frame: 'pd.DataFrame', latest: 'pd.DataFrame', stuck_hours: float) -> 'pd.Series':
+    """Accounts per level whose level has not changed for at least ``stuck_hours``."""
+    window = stuck_hours * 3600
+    grouped = frame.groupby("session_id", sort=False)["ts"]
+    last_seen = grouped.transform("max")
+    observed_long_enough = (grouped.max() - grouped.min()) >= window
+    recent = frame[frame["ts"] >= last_seen - window].groupby("session_id", sort=False)["level"]
+    unchanged = recent.min() == recent.max()
+    stuck = latest.index[(unchanged & observed_long_enough).reindex(latest.index, fill_value=False)]
+    return latest.loc[stuck, "level"].value_counts().sort_index().rename("accounts")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fleet aggregates over the snapshot store")
+    parser.add_argument("--db", default=settings.FLEET_DB, help="Snapshot database (default: FLEET_DB)")
+    parser.add_argument("--hours", type=float, default=0, help="Only the last N hours (default: everything)")
+    parser.add_argument("--stuck-hours", type=float, default=DEFAULT_STUCK_HOURS,
+                        help="Hours without a level up before an account counts as stuck")
+    args = parser.parse_args()
+    if not args.db:
+        parser.error("set FLEET_DB in .env or pass --db")
+    # Only the report needs pandas, the bot writes the store without it
+    import pandas as pd
+
+    frame = load_snapshots(args.db, args.hours)
+    if frame.empty:
+        sys.stdout.write("No snapshots recorded yet\n")
+        return
+    latest = latest_snapshots(frame)
+    out = sys.stdout
+    out.write(f"Snapshots: {len(frame)}, accounts: {len(latest)}, "
+              f"from {pd.to_datetime(frame['ts'].min(), unit='s')} to {pd.to_datetime(frame['ts'].max(), unit='s')} UTC\n\n")
+    out.write(f"Resources gained per hour\n{resources_per_hour(frame).to_string()}\n\n")
+    done = tutorial_completion(latest)
+    out.write(f"Tutorial completed: {done:.1%} ({int(latest['tutorial_done'].sum())} of {len(latest)})\n\n")
+    stuck = stuck_by_level(frame, latest, args.stuck_hours)
+    out.write(f"Accounts without a level up for {args.stuck_hours:g}h: {int(stuck.sum())}\n")
+    if len(stuck):
+        out.write(stuck.to_string() + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import sqlite3
+from time import time
+from typing import Dict, List, Optional, Tuple
+
+from bot.config import settings
+from bot.utils.logger import logger
+
+FLUSH_INTERVAL = 60
+FLUSH_SIZE = 500
+RESOURCES = ("food", "wood", "stone", "gem")
+
+# Session names live in their own table so each snapshot row is eight numbers
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    ts INTEGER NOT NULL,
+    session_id INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    power INTEGER NOT NULL,
+    food REAL NOT NULL,
+    wood REAL NOT NULL,
+    stone REAL NOT NULL,
+    gem REAL NOT NULL,
+    tutorial_done INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_ts ON snapshots (ts);
+"""
+
+Row = Tuple[int, str, int, int, float, float, float, float, int]
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(db_path, timeout=30)
+    # Several bot processes may share one file: WAL lets the report read while they append
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def _session_ids(connection: sqlite3.Connection, names: List[str]) -> Dict[str, int]:
+    connection.executemany("INSERT OR IGNORE INTO sessions (name) VALUES (?)", [(name,) for name in names])
+    placeholders = ",".join("?" * len(names))
+    return dict(connection.execute(f"SELECT name, id FROM sessions WHERE name IN ({placeholders})", names))
+
+
+def _append(db_path: str, rows: List[Row]) -> None:
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = connect(db_path)
+    try:
+        with connection:
+            ids = _session_ids(connection, sorted({row[1] for row in rows}))
+            connection.executemany(
+                "INSERT INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(row[0], ids[row[1]]) + row[2:] for row in rows]
+            )
+    finally:
+        connection.close()
+
+
+class FleetSnapshotStore:
+    """Append-only SQLite table with one row per ``/user/data/all`` result of every session.
+
+    Rows are buffered in memory and inserted from a worker thread in batches of FLUSH_SIZE
+    or every FLUSH_INTERVAL seconds. ``python -m bot.utils.fleet_report`` aggregates the table.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = settings.FLEET_DB if db_path is None else db_path
+        self._pending: List[Row] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.db_path)
+
+    def record(self, session_name: str, level: int, power: int, resources: Dict[str, float],
+               tutorial_done: bool) -> None:
+        if not self.enabled:
+            return
+        self._pending.append((int(time()), session_name, int(level or 0), int(power or 0),
+                              *(float(resources.get(name) or 0) for name in RESOURCES), int(tutorial_done)))
+        if len(self._pending) >= FLUSH_SIZE:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        try:
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+        except RuntimeError:
+            pass
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        async with self._write_lock:
+            try:
+                await asyncio.to_thread(_append, self.db_path, rows)
+            except (OSError, sqlite3.Error) as error:
+                logger.warning(f"Failed to write {len(rows)} fleet snapshots to {self.db_path}: {error}")
+
+    async def run(self) -> None:
+        try:
+            while True:
+                await asyncio.sleep(FLUSH_INTERVAL)
+                await self.flush()
+        finally:
+            await self.flush()
+
+
+fleet_store = FleetSnapshotStore()
@@ -0,0 +1,136 @@
+from time import monotonic
+from types import SimpleNamespace
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+
+from bot.config import settings
+from bot.utils.logger import DEBUG_LOGGING, logger
+from bot.utils.bandwidth import proxy_label
+from bot.utils.metrics import registry, endpoint_label
+
+# Phases bound by the proxy and the network: pool wait, DNS, the proxy/TCP/TLS handshake and
+# the body download; "wait" is the game server's time to first byte
+NETWORK_PHASES = ("queue", "dns", "connect", "read")
+
+HTTP_PHASE_DURATION = registry.histogram(
+    "fomo_http_phase_seconds", "Duration of each HTTP request phase by proxy and endpoint.",
+    ("proxy", "endpoint", "phase"))
+SLOW_REQUESTS = registry.counter(
+    "fomo_http_slow_requests", "Requests slower than the threshold by the side that caused it.", ("proxy", "cause"))
+
+
+def _elapsed(context: SimpleNamespace, start: str, end: str) -> Optional[float]:
+    started, finished = context.marks.get(start), context.marks.get(end)
+    if started is None or finished is None:
+        return None
+    return max(finished - started, 0.0)
+
+
+def request_phases(context: SimpleNamespace) -> Dict[str, float]:
+    phases = {
+        "queue": _elapsed(context, "queue_start", "queue_end"),
+        "dns": _elapsed(context, "dns_start", "dns_end"),
+        "connect": _elapsed(context, "connect_start", "connect_end"),
+        "send": _elapsed(context, "connection_ready", "sent"),
+        "wait": _elapsed(context, "sent", "headers_received"),
+        "read": _elapsed(context, "headers_received", "body_received"),
+    }
+    if phases["connect"] is not None and phases["dns"] is not None:
+        phases["connect"] = max(phases["connect"] - phases["dns"], 0.0)
+    return {phase: value for phase, value in phases.items() if value is not None}
+
+
+def unfinished_phase(context: SimpleNamespace, now: float) -> Optional[Tuple[str, float]]:
+    """Phase a failed request was in and how long it had been running."""
+    marks = context.marks
+    if "headers_received" in marks:
+        return None
+    if "sent" in marks:
+        return "wait", now - marks["sent"]
+    if "connection_ready" in marks:
+        return "send", now - marks["connection_ready"]
+    if "connect_start" in marks:
+        return "connect", now - marks.get("dns_end", marks["connect_start"])
+    if "queue_start" in marks and "queue_end" not in marks:
+        return "queue", now - marks["queue_start"]
+    return "connect", now - marks.get("queue_end", marks["start"])
+
+
+def slow_cause(phases: Dict[str, float]) -> str:
+    network = sum(phases.get(phase, 0.0) for phase in NETWORK_PHASES)
+    return "proxy" if network > phases.get("wait", 0.0) else "server"
+
+
+def trace_config(session_name: str, proxy: Optional[str], api_host: Optional[str] = None) -> aiohttp.TraceConfig:
+    label = proxy_label(proxy)
+
+    def mark(name: str):
+        async def handler(session, context: SimpleNamespace, params) -> None:
+            context.marks[name] = monotonic()
+        return handler
+
+    async def on_request_start(session, context: SimpleNamespace, params) -> None:
+        context.marks = {"start": monotonic()}
+        context.endpoint = endpoint_label(params.url, api_host)
+
+    async def on_connection_ready(session, context: SimpleNamespace, params) -> None:
+        context.marks.setdefault("connection_ready", monotonic())
+
+    async def on_request_sent(session, context: SimpleNamespace, params) -> None:
+        context.marks["sent"] = monotonic()
+
+    def report(context: SimpleNamespace, phases: Dict[str, float], total: float, outcome: str) -> None:
+        for phase, duration in phases.items():
+            HTTP_PHASE_DURATION.observe(duration, proxy=label, endpoint=context.endpoint, phase=phase)
+
+        if total >= settings.SLOW_REQUEST_THRESHOLD:
+            cause = slow_cause(phases)
+            SLOW_REQUESTS.inc(proxy=label, cause=cause)
+            breakdown = ", ".join(f"{phase}={duration:.2f}s" for phase, duration in phases.items())
+            logger.warning(f"{session_name} | Slow request {context.endpoint} via {label}: {total:.1f}s, {outcome}, "
+                           f"{'proxy/network' if cause == 'proxy' else 'game server'} bound ({breakdown})")
+        elif DEBUG_LOGGING:
+            breakdown = ", ".join(f"{phase}={duration * 1000:.0f}ms" for phase, duration in phases.items())
+            logger.debug(f"[{session_name}] {context.endpoint} via {label}: {outcome}, {breakdown}")
+
+    async def on_request_end(session, context: SimpleNamespace, params) -> None:
+        # Fires once the headers are in; the report waits for the end of the body so the read
+        # phase is part of the breakdown and of slow_cause
+        context.marks["headers_received"] = monotonic()
+        status = f"status {params.response.status}"
+
+        def on_body_received() -> None:
+            context.marks["body_received"] = monotonic()
+            report(context, request_phases(context), context.marks["body_received"] - context.marks["start"], status)
+
+        params.response.content.on_eof(on_body_received)
+
+    async def on_request_exception(session, context: SimpleNamespace, params) -> None:
+        now = monotonic()
+        phases = request_phases(context)
+        unfinished = unfinished_phase(context, now)
+        if unfinished is not None:
+            phase, duration = unfinished
+            phases[phase] = max(phases.get(phase, 0.0) + duration, 0.0)
+        total = now - context.marks["start"]
+        # Timeouts and connection errors are the slowest requests, keep them in the histogram under their own phase
+        HTTP_PHASE_DURATION.observe(total, proxy=label, endpoint=context.endpoint, phase="error")
+        report(context, phases, total, type(params.exception).__name__)
+        context.marks.clear()
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_connection_queued_start.append(mark("queue_start"))
+    trace.on_connection_queued_end.append(mark("queue_end"))
+    trace.on_dns_resolvehost_start.append(mark("dns_start"))
+    trace.on_dns_resolvehost_end.append(mark("dns_end"))
+    trace.on_connection_create_start.append(mark("connect_start"))
+    trace.on_connection_create_end.append(mark("connect_end"))
+    trace.on_connection_create_end.append(on_connection_ready)
+    trace.on_connection_reuseconn.append(on_connection_ready)
+    trace.on_request_headers_sent.append(on_request_sent)
+    trace.on_request_chunk_sent.append(on_request_sent)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    return trace
@@ -0,0 +1,106 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+import aiohttp
+from aiocfscrape import CloudflareScraper
+from aiohttp_proxy import ProxyConnector
+
+from bot.utils import logger
+from bot.utils import http_timing
+from bot.utils.bandwidth import bandwidth_meter
+from bot.utils.metrics import registry
+
+DRAIN_TIMEOUT = 60
+
+_open_clients: Dict[str, int] = defaultdict(int)
+
+
+def open_transports() -> Dict[str, int]:
+    return {session_name: count for session_name, count in _open_clients.items() if count}
+
+
+registry.gauge("fomo_open_http_clients", "HTTP clients currently open per session; more than one outside a "
+               "proxy switch means a leak.", ("session",),
+               collect=lambda: {(session_name,): count for session_name, count in open_transports().items()})
+
+
+class SessionTransport:
+    """Owns the HTTP client of one session and swaps it when the proxy changes.
+
+    All clients share one cookie jar, so cookies and auth survive a switch. The old client
+    keeps serving the requests it already started and is closed once they finish.
+    """
+
+    def __init__(self, session_name: str, proxy: Optional[str] = None, api_host: Optional[str] = None):
+        self.session_name = session_name
+        self.proxy = proxy
+        self.api_host = api_host
+        self.cookie_jar = aiohttp.CookieJar()
+        self._in_flight: Dict[CloudflareScraper, int] = defaultdict(int)
+        self._drained: Dict[CloudflareScraper, asyncio.Event] = {}
+        # Clients counted in fomo_open_http_clients, each is counted down once whoever closed it
+        self._clients: Set[CloudflareScraper] = set()
+        self.client = self._create_client(proxy)
+
+    def _create_client(self, proxy: Optional[str]) -> CloudflareScraper:
+        proxy_conn = {'connector': ProxyConnector.from_url(proxy)} if proxy else {}
+        trace_configs = [bandwidth_meter.trace_config(self.session_name, proxy, self.api_host),
+                         http_timing.trace_config(self.session_name, proxy, self.api_host)]
+        client = CloudflareScraper(timeout=aiohttp.ClientTimeout(60), cookie_jar=self.cookie_jar,
+                                   trace_configs=trace_configs, **proxy_conn)
+        self._clients.add(client)
+        _open_clients[self.session_name] += 1
+        return client
+
+    async def _close_client(self, client: CloudflareScraper) -> None:
+        try:
+            if not client.closed:
+                await client.close()
+        finally:
+            if client in self._clients:
+                self._clients.discard(client)
+                _open_clients[self.session_name] -= 1
+            self._in_flight.pop(client, None)
+            self._drained.pop(client, None)
+
+    @property
+    def in_flight(self) -> int:
+        return sum(self._in_flight.values())
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+        client = self.client
+        self._in_flight[client] += 1
+        try:
+            async with client.request(method, url, **kwargs) as response:
+                yield response
+        finally:
+            self._in_flight[client] -= 1
+            if not self._in_flight[client] and client in self._drained:
+                self._drained[client].set()
+
+    async def switch(self, proxy: Optional[str]) -> None:
+        old_client = self.client
+        self.client = self._create_client(proxy)
+        self.proxy = proxy
+
+        if self._in_flight.get(old_client):
+            drained = self._drained[old_client] = asyncio.Event()
+            try:
+                await asyncio.wait_for(drained.wait(), DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"{self.session_name} | {self._in_flight[old_client]} request(s) still running "
+                               f"on the previous proxy after {DRAIN_TIMEOUT}s, closing it anyway")
+        await self._close_client(old_client)
+
+    async def close(self) -> None:
+        await self._close_client(self.client)
+        await bandwidth_meter.persist(force=True)
+
+    async def __aenter__(self) -> 'SessionTransport':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
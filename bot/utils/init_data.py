@@ -0,0 +1,76 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping
+from urllib.parse import unquote
+
+from bot.utils import json_codec
+
+
+def _split_pairs(query: str) -> Mapping[str, str]:
+    pairs = {}
+    for part in query.split("&"):
+        key, _, value = part.partition("=")
+        if key and key not in pairs:
+            pairs[key] = value
+    return pairs
+
+
+@dataclass(frozen=True)
+class InitData:
+    raw: str
+    fields: Mapping[str, str]
+    user: Mapping[str, Any] = field(default_factory=dict)
+    version: str = ""
+    platform: str = ""
+
+    @classmethod
+    def parse(cls, raw: str, version: str = "", platform: str = "") -> 'InitData':
+        fields = {key: unquote(value) for key, value in _split_pairs(raw).items()}
+        try:
+            user = json_codec.loads(fields["user"]) if "user" in fields else {}
+        except ValueError:
+            user = {}
+        return cls(
+            raw=raw,
+            fields=MappingProxyType(fields),
+            user=MappingProxyType(user if isinstance(user, dict) else {}),
+            version=version,
+            platform=platform,
+        )
+
+    @classmethod
+    def from_webview_url(cls, url: str) -> 'InitData':
+        _, separator, fragment = url.partition("#")
+        if not separator:
+            raise ValueError("No fragment found in URL")
+        params = _split_pairs(fragment)
+        if "tgWebAppData" not in params:
+            raise ValueError("tgWebAppData not found in URL fragment")
+        return cls.parse(
+            unquote(params["tgWebAppData"]),
+            version=params.get("tgWebAppVersion", ""),
+            platform=params.get("tgWebAppPlatform", ""),
+        )
+
+    def get(self, name: str, default: str = "") -> str:
+        return self.fields.get(name) or default
+
+    @property
+    def hash(self) -> str:
+        return self.get("hash")
+
+    @property
+    def chat_type(self) -> str:
+        return self.get("chat_type")
+
+    @property
+    def chat_instance(self) -> str:
+        return self.get("chat_instance")
+
+    @property
+    def start_param(self) -> str:
+        return self.get("start_param")
+
+    @property
+    def photo_url(self) -> str:
+        return self.user.get("photo_url", "")
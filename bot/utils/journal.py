@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import glob
+import gzip
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+from time import monotonic, time
+from typing import Any, Dict, Iterator, List, Optional
+
+from bot.config import settings
+from bot.utils import json_codec
+from bot.utils.logger import logger
+
+FLUSH_INTERVAL = 30
+FLUSH_SIZE = 100
+
+
+def _day(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).date().isoformat()
+
+
+def _session_dir(journal_dir: str, session_name: str) -> str:
+    return os.path.join(journal_dir, session_name)
+
+
+def _compress(path: str) -> None:
+    # Appending adds a gzip member when late events arrive for a day that is already compressed;
+    # gzip readers handle multi-member files transparently
+    with open(path, "rb") as source, gzip.open(f"{path}.gz", "ab") as target:
+        shutil.copyfileobj(source, target)
+    os.remove(path)
+
+
+def _append(journal_dir: str, session_name: str, lines_by_day: Dict[str, List[str]]) -> None:
+    directory = _session_dir(journal_dir, session_name)
+    os.makedirs(directory, exist_ok=True)
+    for day, lines in lines_by_day.items():
+        with open(os.path.join(directory, f"{day}.jsonl"), "a", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+    latest_day = max(lines_by_day)
+    for path in glob.glob(os.path.join(directory, "*.jsonl")):
+        if os.path.basename(path)[:-len(".jsonl")] < latest_day:
+            _compress(path)
+
+
+class SessionJournal:
+    """Structured activity log of one session: one JSONL file per UTC day, gzipped once the day is over.
+
+    Events are buffered in memory and written from a worker thread every FLUSH_INTERVAL
+    seconds, every FLUSH_SIZE events, after errors and before the session goes to sleep.
+    """
+
+    def __init__(self, session_name: str, journal_dir: Optional[str] = None):
+        self.session_name = session_name
+        self.journal_dir = settings.JOURNAL_DIR if journal_dir is None else journal_dir
+        self._pending: List[Dict[str, Any]] = []
+        self._last_flush = monotonic()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.journal_dir)
+
+    def record(self, event: str, **fields) -> None:
+        if not self.enabled:
+            return
+        self._pending.append({"ts": round(time(), 3), "event": event, **fields})
+        if event == "error" or len(self._pending) >= FLUSH_SIZE or monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        try:
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+        except RuntimeError:
+            pass
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        events, self._pending = self._pending, []
+        self._last_flush = monotonic()
+        lines_by_day: Dict[str, List[str]] = {}
+        for event in events:
+            lines_by_day.setdefault(_day(event["ts"]), []).append(json_codec.dumps(event))
+        async with self._write_lock:
+            try:
+                await asyncio.to_thread(_append, self.journal_dir, self.session_name, lines_by_day)
+            except OSError as error:
+                logger.warning(f"{self.session_name} | Failed to write activity journal: {error}")
+
+
+def journal_files(session_name: str, journal_dir: Optional[str] = None) -> List[str]:
+    directory = _session_dir(settings.JOURNAL_DIR if journal_dir is None else journal_dir, session_name)
+    files = glob.glob(os.path.join(directory, "*.jsonl")) + glob.glob(os.path.join(directory, "*.jsonl.gz"))
+    return sorted(files, key=lambda path: os.path.basename(path).split(".")[0])
+
+
+def iter_events(session_name: str, event: Optional[str] = None, since: Optional[str] = None,
+                until: Optional[str] = None, journal_dir: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream journal events line by line; ``since``/``until`` are inclusive ``YYYY-MM-DD`` days."""
+    for path in journal_files(session_name, journal_dir):
+        day = os.path.basename(path).split(".")[0]
+        if (since and day < since) or (until and day > until):
+            continue
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json_codec.loads(line)
+                if event is None or record.get("event") == event:
+                    yield record
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Print a session's activity journal as JSONL")
+    parser.add_argument("session", help="Session name")
+    parser.add_argument("--event", help="Only this event type, e.g. api, login, snapshot, error")
+    parser.add_argument("--since", help="First day to read, YYYY-MM-DD")
+    parser.add_argument("--until", help="Last day to read, YYYY-MM-DD")
+    parser.add_argument("--dir", default=None, help="Journal directory (default: JOURNAL_DIR)")
+    args = parser.parse_args()
+    for record in iter_events(args.session, args.event, args.since, args.until, args.dir):
+        sys.stdout.write(json_codec.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+elif msgspec is not None:
+    BACKEND = "msgspec"
+else:
+    BACKEND = "json"
+
+_msgspec_encoder = msgspec.json.Encoder() if msgspec is not None else None
+_msgspec_decoder = msgspec.json.Decoder() if msgspec is not None else None
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    if _msgspec_decoder is not None:
+        return _msgspec_decoder.decode(data.encode() if isinstance(data, str) else data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    try:
+        if orjson is not None:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+        if _msgspec_encoder is not None and not indent:
+            return _msgspec_encoder.encode(obj).decode()
+    except (TypeError, ValueError, OverflowError):
+        pass
+    if indent:
+        return json.dumps(obj, indent=2)
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def _has_float(obj: Any) -> bool:
+    if isinstance(obj, float):
+        return True
+    if isinstance(obj, dict):
+        return any(_has_float(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_float(value) for value in obj)
+    return False
+
+
+def _fast_compact(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return _msgspec_encoder.encode(obj)
+
+
+def dumps_signed(obj: Any) -> str:
+    """Compact JSON that is byte-identical to ``json.dumps(obj, separators=(',', ':'))``.
+
+    The game API signs the exact request body, so the fast encoder is only used when
+    its output cannot differ from the stdlib: no floats and pure ASCII output without DEL,
+    which the stdlib escapes as ``\\u007f`` and the fast encoders write as a raw byte.
+    """
+    if BACKEND != "json" and not _has_float(obj):
+        try:
+            encoded = _fast_compact(obj)
+        except (TypeError, ValueError, OverflowError):
+            encoded = None
+        if encoded is not None and encoded.isascii() and b"\x7f" not in encoded:
+            return encoded.decode()
+    return json.dumps(obj, separators=(',', ':'))
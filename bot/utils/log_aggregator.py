@@ -0,0 +1,90 @@
+import asyncio
+import re
+from threading import Lock
+from time import monotonic
+from typing import Callable, Dict, List, Set, Tuple
+
+AGGREGATED_LEVEL = 30  # WARNING and above
+SESSION_MARK = "\0"
+# "session | text", "[session] text" and "session text" all become "text"
+_SESSION_PREFIX = re.compile(r"^\[?\0\]?\s*\|?\s*")
+# Proxies and hosts differ per session and may carry credentials, summaries must not show them
+_URL = re.compile(r"\b[a-z][a-z0-9+.-]*://\S+", re.IGNORECASE)
+_HOST_PORT = re.compile(r"\b(?:[^\s@/:]+(?::[^\s@/]*)?@)?(?:[\w-]+\.)+[\w-]+:\d{1,5}\b")
+# Jittered delays and durations ("retry in 3.4s") differ per session
+_DECIMAL = re.compile(r"\d+\.\d+")
+
+Emit = Callable[[str, str], None]
+
+
+class _Group:
+    __slots__ = ("level", "message", "started", "sessions", "suppressed")
+
+    def __init__(self, level: str, message: str, session: str):
+        self.level = level
+        self.message = message
+        self.started = monotonic()
+        self.sessions: Set[str] = {session}
+        self.suppressed = 0
+
+
+class LogAggregator:
+    """Collapses a warning or error repeated by many sessions into one summary line.
+
+    The first occurrence is logged as usual; identical messages from other sessions within
+    ``window`` seconds are held back and reported as "N sessions: message" when it closes.
+    Messages are compared with the session name, URLs and ``host:port`` addresses taken out,
+    so only records logged inside ``logger.contextualize(session=...)`` are grouped and a
+    summary never shows one session's proxy.
+    """
+
+    def __init__(self, window: float, emit: Emit):
+        self.window = window
+        self._emit = emit
+        self._groups: Dict[Tuple[str, str], _Group] = {}
+        self._lock = Lock()
+
+    def accept(self, record) -> bool:
+        session = record["extra"].get("session")
+        if (not self.window or not session or record["level"].no < AGGREGATED_LEVEL
+                or record["extra"].get("aggregated")):
+            return True
+
+        message = _SESSION_PREFIX.sub("", record["message"].replace(session, SESSION_MARK))
+        message = _HOST_PORT.sub("<address>", _URL.sub("<address>", message))
+        key = (record["level"].name, _DECIMAL.sub("#", message))
+        with self._lock:
+            group = self._groups.get(key)
+            if group is not None and monotonic() - group.started < self.window:
+                group.sessions.add(session)
+                group.suppressed += 1
+                return False
+            self._groups[key] = _Group(record["level"].name, message, session)
+        if group is not None:
+            self._report(group)
+        return True
+
+    def _report(self, group: _Group) -> None:
+        if not group.suppressed:
+            return
+        message = group.message.replace(SESSION_MARK, "<session>")
+        repeats = f", {group.suppressed + 1} times" if group.suppressed + 1 > len(group.sessions) else ""
+        self._emit(group.level, f"{len(group.sessions)} sessions{repeats}: {message}")
+
+    def flush(self, force: bool = False) -> None:
+        now = monotonic()
+        with self._lock:
+            expired: List[_Group] = []
+            for key, group in list(self._groups.items()):
+                if force or now - group.started >= self.window:
+                    expired.append(self._groups.pop(key))
+        for group in expired:
+            self._report(group)
+
+    async def run(self) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.window / 2)
+                self.flush()
+        finally:
+            self.flush(force=True)
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import sys
+import threading
+import traceback
+from time import monotonic
+from typing import Optional
+
+from bot.config import settings
+from bot.utils.logger import logger
+
+CHECK_INTERVAL = 0.25
+REPORT_INTERVAL = 60
+STACK_LIMIT = 15
+
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+
+def _describe(task: Optional[asyncio.Task]) -> str:
+    if task is None:
+        return "a callback outside any task"
+    return f"task {task.get_name()} ({task.get_coro().__qualname__})"
+
+
+def _blocking_stack(frame) -> str:
+    """Stack of the loop thread from the running coroutine down, without the event loop frames."""
+    frames = traceback.extract_stack(frame)
+    for index in range(len(frames) - 1, -1, -1):
+        if frames[index].filename.startswith(_ASYNCIO_DIR):
+            frames = frames[index + 1:] or frames
+            break
+    return "".join(traceback.format_list(frames[-STACK_LIMIT:])).rstrip()
+
+
+class LoopMonitor:
+    """Measures event loop scheduling lag and reports whatever blocks the loop.
+
+    A coroutine sleeps CHECK_INTERVAL and measures how late it wakes up. A watchdog thread
+    follows its heartbeat and, while the loop is still blocked past the threshold, logs the
+    running task and the stack it is stuck in.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.max_lag = 0.0
+        self._lag_total = 0.0
+        self._samples = 0
+        self._heartbeat = monotonic()
+        self._stall_reported = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.threshold / 2):
+            blocked = monotonic() - self._heartbeat - CHECK_INTERVAL
+            if blocked < self.threshold or self._stall_reported:
+                continue
+            self._stall_reported = True
+            task = asyncio.current_task(self._loop)
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = _blocking_stack(frame) if frame is not None else "<stack unavailable>"
+            logger.opt(colors=False).warning(
+                f"Event loop blocked for {blocked:.1f}s by {_describe(task)}, still running:\n{stack}")
+
+    def _record(self, lag: float) -> None:
+        self.max_lag = max(self.max_lag, lag)
+        self._lag_total += lag
+        self._samples += 1
+        if self._stall_reported:
+            self._stall_reported = False
+            logger.warning(f"Event loop resumed after a {lag:.1f}s stall")
+        elif lag >= self.threshold:
+            logger.warning(f"Event loop lag {lag:.2f}s")
+
+    def _report(self) -> None:
+        if settings.DEBUG_LOGGING and self._samples:
+            logger.debug(f"Event loop lag over {REPORT_INTERVAL}s: avg {self._lag_total / self._samples * 1000:.1f}ms, "
+                         f"max {self.max_lag * 1000:.1f}ms")
+        self.max_lag = self._lag_total = 0.0
+        self._samples = 0
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = last_report = monotonic()
+        watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        watchdog.start()
+        try:
+            while True:
+                expected = monotonic() + CHECK_INTERVAL
+                await asyncio.sleep(CHECK_INTERVAL)
+                now = monotonic()
+                self._record(max(now - expected, 0.0))
+                self._heartbeat = now
+                if now - last_report >= REPORT_INTERVAL:
+                    self._report()
+                    last_report = now
+        finally:
+            self._stopped.set()
+
+
+async def monitor_event_loop() -> None:
+    await LoopMonitor(settings.LOOP_LAG_THRESHOLD).run()
@@ -0,0 +1,254 @@
+import asyncio
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import monotonic
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from aiohttp import web
+from yarl import URL
+
+from bot.config import settings
+from bot.utils.logger import logger
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+Sample = Tuple[str, Dict[str, str], float]
+Collector = Callable[[], Dict[Tuple[str, ...], float]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def endpoint_label(url: URL, api_host: Optional[str] = None) -> str:
+    # API calls are split by path, everything else (proxy probes, challenges) by host
+    return url.path if url.host == api_host else url.host or str(url)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    @property
+    def family(self) -> str:
+        """Name used in the HELP and TYPE lines of the exposition."""
+        return self.name
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Sample]:
+        return iter(())
+
+
+class Counter(Metric):
+    """Counter exposed as ``<name>_total``.
+
+    Text format 0.0.4 has no family/sample suffix rule, so HELP and TYPE carry the full sample
+    name like client_python does; otherwise Prometheus ingests the samples as untyped.
+    """
+    kind = "counter"
+    suffix = "_total"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 collect: Optional[Collector] = None):
+        if self.suffix and name.endswith(self.suffix):
+            name = name[:-len(self.suffix)]
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._collect = collect
+
+    @property
+    def family(self) -> str:
+        return f"{self.name}{self.suffix}"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        values = self._collect() if self._collect else self._values
+        for key, value in values.items():
+            yield f"{self.name}{self.suffix}", dict(zip(self.labelnames, key)), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+    suffix = ""
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[Dict[str, str]]:
+        """Observe the duration of the block; labels can be filled in through the yielded dict."""
+        started = monotonic()
+        try:
+            yield labels
+        except BaseException:
+            if "result" in self.labelnames:
+                labels["result"] = "error"
+            raise
+        else:
+            if "result" in self.labelnames:
+                labels.setdefault("result", "ok")
+        finally:
+            self.observe(monotonic() - started, **labels)
+
+    def samples(self) -> Iterator[Sample]:
+        for key, (counts, total) in self._values.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total[0]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                collect: Optional[Collector] = None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, collect))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+              collect: Optional[Collector] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.family} {metric.documentation}")
+            lines.append(f"# TYPE {metric.family} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+SESSION_STATES = ("starting", "running", "tutorial", "sleeping", "errored")
+_session_states: Dict[str, str] = {}
+# Previous state and the monotonic time of the last change, for task dumps
+_state_changes: Dict[str, Tuple[Optional[str], float]] = {}
+
+
+def set_session_state(session_name: str, state: str) -> None:
+    previous = _session_states.get(session_name)
+    _session_states[session_name] = state
+    if previous != state:
+        _state_changes[session_name] = (previous, monotonic())
+
+
+def clear_session_state(session_name: str) -> None:
+    _session_states.pop(session_name, None)
+    _state_changes.pop(session_name, None)
+
+
+def session_stage(session_name: str) -> Optional[Tuple[str, Optional[str], float]]:
+    """Current state, the state before it and seconds spent in the current one."""
+    state = _session_states.get(session_name)
+    if state is None:
+        return None
+    previous, changed_at = _state_changes.get(session_name, (None, monotonic()))
+    return state, previous, monotonic() - changed_at
+
+
+def _count_session_states() -> Dict[Tuple[str, ...], float]:
+    counts = {(state,): 0 for state in SESSION_STATES}
+    for state in _session_states.values():
+        counts[(state,)] = counts.get((state,), 0) + 1
+    return counts
+
+
+registry.gauge("fomo_sessions", "Number of sessions in each lifecycle state.", ("state",),
+               collect=_count_session_states)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "fomo_http_request_duration_seconds", "Duration of game API request attempts.", ("endpoint", "status"))
+RELOGINS = registry.counter("fomo_relogins", "Re-logins triggered by expired auth.", ("result",))
+PROXY_CHECKS = registry.counter("fomo_proxy_checks", "Proxy health checks run by sessions.", ("result",))
+PROXY_CHECK_DURATION = registry.histogram(
+    "fomo_proxy_check_duration_seconds", "Duration of check_and_update_proxy.", ("result",))
+PROXY_SWITCHES = registry.counter("fomo_proxy_switches", "Proxy switches done by sessions.")
+LOCK_WAIT = registry.histogram("fomo_lock_wait_seconds", "Time spent acquiring inter-process locks.", ("lock",))
+LOCK_HOLD = registry.histogram("fomo_lock_hold_seconds", "Time inter-process locks were held.", ("lock",))
+LOCK_RETRIES = registry.counter("fomo_lock_retries", "Failed inter-process lock acquisition attempts.", ("lock",))
+TELEGRAM_WEBVIEW_DURATION = registry.histogram(
+    "fomo_telegram_webview_duration_seconds", "Duration of Telegram webview URL requests, including the "
+    "connect and disconnect.", ("client", "result"))
+
+
+async def _metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(body=registry.render().encode(),
+                        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+async def _health_handler(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok", "sessions": len(_session_states)})
+
+
+async def _tasks_handler(request: web.Request) -> web.Response:
+    from bot.utils.task_dump import write_task_dump
+    path, text = await write_task_dump()
+    return web.Response(text=text, headers={"X-Dump-File": path})
+
+
+def create_metrics_app() -> web.Application:
+    app = web.Application()
+    app.router.add_get("/metrics", _metrics_handler)
+    app.router.add_get("/healthz", _health_handler)
+    app.router.add_get("/tasks", _tasks_handler)
+    return app
+
+
+async def run_metrics_server() -> None:
+    runner = web.AppRunner(create_metrics_app(), access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, settings.METRICS_HOST, settings.METRICS_PORT).start()
+        logger.info(f"Metrics available at http://{settings.METRICS_HOST}:{settings.METRICS_PORT}/metrics")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import selectors
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from bot.utils.logger import logger
+
+SAMPLE_INTERVAL = 0.01
+DEFAULT_PROFILE_WINDOW = 60
+MAX_DEPTH = 64
+PROFILE_DIR = "logs"
+SESSION_TASK_PREFIX = "session:"
+IDLE = "(idle)"
+# Frame of the event loop running a callback, the task's own stack starts right below it
+_HANDLE_RUN = asyncio.events.Handle._run.__code__
+# Matched from the innermost frame outwards, the first hit names the code path
+CODE_PATHS = (
+    ("loguru", "logging"),
+    ("json", "json"),
+    ("telethon", "mtproto"),
+    ("pyrogram", "mtproto"),
+    ("aiohttp", "http"),
+    ("aiocfscrape", "http"),
+)
+
+
+def session_task_name(session_name: str) -> str:
+    return f"{SESSION_TASK_PREFIX}{session_name}"
+
+
+def _task_label(task: Optional[asyncio.Task]) -> str:
+    if task is None:
+        return "(loop)"
+    name = task.get_name()
+    # Library tasks keep the default Task-N name, their coroutine says more
+    return task.get_coro().__qualname__ if name.startswith("Task-") else name
+
+
+def _code_path(frames: List) -> str:
+    for frame in reversed(frames):
+        filename = frame.f_code.co_filename
+        if frame.f_code.co_name == "make_request":
+            return "make_request"
+        for marker, path in CODE_PATHS:
+            if marker in filename:
+                return path
+    return "other"
+
+
+def _frame_label(frame) -> str:
+    module = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+    return f"{frame.f_code.co_qualname} ({module})".replace(";", ",")
+
+
+class TaskProfiler:
+    """Samples the event loop thread and attributes each sample to the running asyncio task.
+
+    A daemon thread reads the loop thread's frame every SAMPLE_INTERVAL, so the loop itself
+    does no extra work apart from the GIL switches. Stacks are kept in collapsed form
+    ("task;frame;frame count") that flamegraph.pl and speedscope read directly.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.tasks: Counter = Counter()
+        self.code_paths: Counter = Counter()
+        self.idle = 0
+
+    def _sample(self, loop: asyncio.AbstractEventLoop, thread_id: int) -> None:
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            return
+        task = asyncio.current_task(loop)
+        if task is None and frame.f_code.co_filename == selectors.__file__:
+            self.idle += 1
+            self.stacks[IDLE] += 1
+            return
+
+        frames = []
+        while frame is not None and frame.f_code is not _HANDLE_RUN and len(frames) < MAX_DEPTH:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+
+        label = _task_label(task)
+        self.tasks[label] += 1
+        self.code_paths[_code_path(frames)] += 1
+        self.stacks[";".join([label] + [_frame_label(frame) for frame in frames])] += 1
+
+    def _run(self, loop: asyncio.AbstractEventLoop, thread_id: int, stopped: threading.Event) -> None:
+        while not stopped.wait(self.interval):
+            self._sample(loop, thread_id)
+
+    async def profile(self, duration: float) -> None:
+        stopped = threading.Event()
+        sampler = threading.Thread(target=self._run, name="task-profiler", daemon=True,
+                                   args=(asyncio.get_running_loop(), threading.get_ident(), stopped))
+        sampler.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            stopped.set()
+            await asyncio.to_thread(sampler.join)
+
+    def busy_samples(self) -> int:
+        return sum(self.tasks.values())
+
+    def top(self, counter: Counter, limit: int = 5) -> List[Tuple[str, float]]:
+        busy = self.busy_samples() or 1
+        return [(name, count * 100 / busy) for name, count in counter.most_common(limit)]
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+_active_profiler: Optional[TaskProfiler] = None
+
+
+async def run_profile(duration: float) -> Optional[str]:
+    global _active_profiler
+    if _active_profiler is not None:
+        logger.warning("Profiler is already running, ignoring the request")
+        return None
+
+    profiler = _active_profiler = TaskProfiler()
+    logger.info(f"Profiling the event loop for {duration:g}s")
+    try:
+        await profiler.profile(duration)
+    finally:
+        _active_profiler = None
+
+    path = os.path.join(PROFILE_DIR, f"profile_{datetime.now():%Y%m%d_%H%M%S}.collapsed")
+    await asyncio.to_thread(profiler.write, path)
+    total = profiler.busy_samples() + profiler.idle
+    busy_share = profiler.busy_samples() * 100 / total if total else 0
+    logger.info(f"Profile written to {path}: {total} samples, loop busy {busy_share:.0f}%")
+    if profiler.busy_samples():
+        # Task and frame names can contain "<...>", which the colored logger would parse as markup
+        plain_logger = logger.opt(colors=False)
+        plain_logger.info("Top tasks: " + ", ".join(f"{name} {share:.0f}%"
+                                                    for name, share in profiler.top(profiler.tasks)))
+        plain_logger.info("Code paths: " + ", ".join(f"{name} {share:.0f}%"
+                                                     for name, share in profiler.top(profiler.code_paths, limit=10)))
+    return path
@@ -55,11 +55,14 @@ def get_unused_proxies(accounts_config: dict, proxy_path: str) -> list[str]:
     all_proxies = get_proxies(proxy_path)
     return [proxy for proxy in all_proxies if proxies_count.get(proxy, 0) < settings.SESSIONS_PER_PROXY]
 
-async def check_proxy(proxy: str) -> bool:
+async def check_proxy(proxy: str, session_name: str = "proxy_check") -> bool:
+    from bot.utils.bandwidth import bandwidth_meter
     url = 'https://ifconfig.me/ip'
     proxy_conn = ProxyConnector.from_url(proxy)
+    trace_configs = [bandwidth_meter.trace_config(session_name, proxy)]
     try:
-        async with aiohttp.ClientSession(connector=proxy_conn, timeout=aiohttp.ClientTimeout(15)) as session:
+        async with aiohttp.ClientSession(connector=proxy_conn, timeout=aiohttp.ClientTimeout(15),
+                                         trace_configs=trace_configs) as session:
             response = await session.get(url)
             if response.status == 200:
                 logger.success(f"Successfully connected to proxy. IP: {await response.text()}")
@@ -79,15 +82,16 @@ async def get_proxy_chain(path: str) -> tuple[str | None, str | None]:
         logger.error(f"Failed to get proxy for proxy chain from '{path}'")
         return None, None
 
-async def get_working_proxy(accounts_config: dict, current_proxy: str | None) -> str | None:
-    if current_proxy and await check_proxy(current_proxy):
+async def get_working_proxy(accounts_config: dict, current_proxy: str | None,
+                            session_name: str = "proxy_check") -> str | None:
+    if current_proxy and await check_proxy(current_proxy, session_name):
         return current_proxy
 
     from bot.utils import PROXIES_PATH
     unused_proxies = get_unused_proxies(accounts_config, PROXIES_PATH)
     shuffle(unused_proxies)
     for proxy in unused_proxies:
-        if await check_proxy(proxy):
+        if await check_proxy(proxy, session_name):
             return proxy
 
     return None
\ No newline at end of file
@@ -0,0 +1,71 @@
+import asyncio
+from time import monotonic
+from typing import Dict, Tuple
+
+from bot.config import settings
+from bot.utils.retry_policy import RATE_LIMIT_STATUSES
+
+RATE_LIMIT_CLASSES: Dict[str, Tuple[float, float]] = {
+    "auth": (settings.API_AUTH_RATE_LIMIT, 3),
+    "read": (settings.API_RATE_LIMIT / 2, settings.API_RATE_LIMIT),
+    "write": (settings.API_RATE_LIMIT / 4, settings.API_RATE_LIMIT / 2),
+}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.base_rate = rate
+        self.min_rate = rate / 16
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = self.capacity
+        self._updated = monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def throttle(self) -> None:
+        self._refill()
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = min(self._tokens, 0)
+
+    def recover(self) -> None:
+        if self.rate < self.base_rate:
+            self._refill()
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 20)
+
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: float, classes: Dict[str, Tuple[float, float]]):
+        self._global = TokenBucket(rate, burst)
+        self._buckets = {name: TokenBucket(*quota) for name, quota in classes.items()}
+
+    def _bucket(self, rate_class: str) -> TokenBucket:
+        return self._buckets.get(rate_class) or self._buckets["write"]
+
+    async def acquire(self, rate_class: str) -> None:
+        await self._bucket(rate_class).acquire()
+        await self._global.acquire()
+
+    def feedback(self, rate_class: str, status: int) -> None:
+        bucket = self._bucket(rate_class)
+        if status in RATE_LIMIT_STATUSES:
+            bucket.throttle()
+            self._global.throttle()
+        elif status < 400:
+            bucket.recover()
+            self._global.recover()
+
+
+api_rate_limiter = RateLimiter(settings.API_RATE_LIMIT, settings.API_RATE_LIMIT * 2, RATE_LIMIT_CLASSES)
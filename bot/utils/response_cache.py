@@ -0,0 +1,41 @@
+from time import monotonic
+from typing import Dict, Optional, Tuple
+
+
+class ResponseCache:
+    def __init__(self, ttls: Dict[str, float], invalidations: Dict[str, Optional[Tuple[str, ...]]]):
+        self._ttls = ttls
+        self._invalidations = invalidations
+        self._entries: Dict[Tuple[str, str], Tuple[float, dict]] = {}
+
+    def is_cacheable(self, path: str) -> bool:
+        return path in self._ttls
+
+    def get(self, path: str, key: str) -> Optional[dict]:
+        entry = self._entries.get((path, key))
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < monotonic():
+            del self._entries[(path, key)]
+            return None
+        return value
+
+    def set(self, path: str, key: str, value: dict) -> None:
+        self._entries[(path, key)] = (monotonic() + self._ttls[path], value)
+
+    def invalidate(self, *paths: str) -> None:
+        if not paths:
+            self._entries.clear()
+            return
+        for entry_key in [k for k in self._entries if k[0] in paths]:
+            del self._entries[entry_key]
+
+    def on_mutation(self, path: str) -> None:
+        if path in self._ttls:
+            return
+        affected = self._invalidations.get(path)
+        if affected is None:
+            self.invalidate()
+        elif affected:
+            self.invalidate(*affected)
@@ -0,0 +1,101 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from random import uniform
+from typing import Dict, Optional
+
+import aiohttp
+
+from bot.config import settings
+
+
+class FailureKind(str, Enum):
+    TRANSPORT = "transport"
+    GATEWAY = "gateway"
+    RATE_LIMIT = "rate_limit"
+    AUTH = "auth"
+
+
+@dataclass(frozen=True)
+class BackoffPolicy:
+    base: float
+    cap: float
+    max_retries: int
+
+    def delay(self, attempt: int) -> float:
+        ceiling = min(self.cap, self.base * (2 ** attempt))
+        return uniform(ceiling / 2, ceiling)
+
+
+RETRY_POLICIES: Dict[FailureKind, BackoffPolicy] = {
+    FailureKind.TRANSPORT: BackoffPolicy(base=1, cap=15, max_retries=3),
+    FailureKind.GATEWAY: BackoffPolicy(base=2, cap=30, max_retries=3),
+    FailureKind.RATE_LIMIT: BackoffPolicy(base=5, cap=60, max_retries=3),
+    FailureKind.AUTH: BackoffPolicy(base=0, cap=0, max_retries=1),
+}
+
+AUTH_STATUSES = frozenset({401, 403})
+RATE_LIMIT_STATUSES = frozenset({418, 429})
+GATEWAY_STATUSES = frozenset({500, 502, 503, 504, 520, 521, 522, 523, 524})
+
+
+def classify_status(status: int) -> Optional[FailureKind]:
+    if status in AUTH_STATUSES:
+        return FailureKind.AUTH
+    if status in RATE_LIMIT_STATUSES:
+        return FailureKind.RATE_LIMIT
+    if status in GATEWAY_STATUSES:
+        return FailureKind.GATEWAY
+    return None
+
+
+def classify_exception(error: BaseException) -> Optional[FailureKind]:
+    if isinstance(error, aiohttp.ContentTypeError):
+        return None
+    if isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError)):
+        return FailureKind.TRANSPORT
+    return None
+
+
+def is_safe_to_repeat(kind: FailureKind, error: Optional[BaseException] = None) -> bool:
+    if kind in (FailureKind.AUTH, FailureKind.RATE_LIMIT):
+        return True
+    return isinstance(error, aiohttp.ClientConnectorError)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryBudget:
+    def __init__(self, total: Optional[int] = None):
+        self.remaining = settings.REQUEST_RETRY_BUDGET if total is None else total
+        self._attempts: Dict[FailureKind, int] = {kind: 0 for kind in FailureKind}
+
+    def next_delay(self, kind: FailureKind, retry_after: Optional[float] = None) -> Optional[float]:
+        policy = RETRY_POLICIES[kind]
+        attempt = self._attempts[kind]
+        if self.remaining <= 0 or attempt >= policy.max_retries:
+            return None
+        if retry_after is not None and retry_after > settings.RETRY_AFTER_MAX:
+            return None
+
+        self._attempts[kind] = attempt + 1
+        self.remaining -= 1
+        delay = policy.delay(attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
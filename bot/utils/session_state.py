@@ -0,0 +1,37 @@
+import asyncio
+import os
+
+from bot.utils import logger, CONFIG_PATH, json_codec
+
+SESSION_STATE_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'session_state')
+
+
+def get_session_state_path(kind: str, session_name: str) -> str:
+    return os.path.join(SESSION_STATE_PATH, kind, f"{session_name}.json")
+
+
+def read_session_state(kind: str, session_name: str) -> dict:
+    state_path = get_session_state_path(kind, session_name)
+    try:
+        with open(state_path, 'r', encoding='utf-8') as file:
+            content = file.read()
+            return json_codec.loads(content) if content else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as error:
+        logger.warning(f"{session_name} | Failed to read {kind} state `{state_path}`: {error}")
+        return {}
+
+
+def write_file_atomic(file_path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, file_path)
+
+
+async def write_session_state(kind: str, session_name: str, state: dict) -> None:
+    await asyncio.to_thread(write_file_atomic, get_session_state_path(kind, session_name), json_codec.dumps(state))
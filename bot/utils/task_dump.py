@@ -0,0 +1,94 @@
+import asyncio
+import linecache
+import os
+from datetime import datetime
+from typing import List, Tuple
+
+from bot.utils.logger import logger
+from bot.utils.metrics import session_stage
+from bot.utils.profiler import SESSION_TASK_PREFIX
+
+DUMP_DIR = "logs"
+_SLEEP = asyncio.sleep.__code__
+
+
+def _await_frames(task: asyncio.Task) -> List:
+    """Frames of the coroutines the task is suspended in, outermost first.
+
+    ``Task.get_stack`` only returns the outermost frame of a suspended task, the rest of
+    the chain is reachable through ``cr_await``.
+    """
+    frames = []
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+
+def _waiting_on(task: asyncio.Task, frames: List, loop: asyncio.AbstractEventLoop) -> str:
+    if frames and frames[-1].f_code is _SLEEP:
+        delay = frames[-1].f_locals.get("delay") or 0
+        handle = frames[-1].f_locals.get("h")
+        if handle is not None:
+            left = max(handle.when() - loop.time(), 0)
+            return f"asyncio.sleep({delay:g}), waited {delay - left:.1f}s, {left:.1f}s left"
+    waiter = getattr(task, "_fut_waiter", None)
+    return repr(waiter) if waiter is not None else "nothing, scheduled to run"
+
+
+def _frame_lines(frame) -> List[str]:
+    code = frame.f_code
+    filename = os.path.relpath(code.co_filename) if code.co_filename.startswith(os.getcwd()) else code.co_filename
+    lines = [f"    {filename}:{frame.f_lineno} in {code.co_qualname}"]
+    source = linecache.getline(code.co_filename, frame.f_lineno).strip()
+    if source:
+        lines.append(f"      {source}")
+    return lines
+
+
+def _describe(task: asyncio.Task, loop: asyncio.AbstractEventLoop) -> List[str]:
+    name = task.get_name()
+    header = name
+    if name.startswith(SESSION_TASK_PREFIX):
+        stage = session_stage(name[len(SESSION_TASK_PREFIX):])
+        if stage is not None:
+            state, previous, seconds = stage
+            header += f" | {state} for {seconds:.1f}s, previous stage: {previous or '-'}"
+    if task.done():
+        return [header, "  finished"]
+
+    frames = _await_frames(task)
+    lines = [header, f"  waiting on: {_waiting_on(task, frames, loop)}"]
+    for frame in frames:
+        lines.extend(_frame_lines(frame))
+    return lines
+
+
+def format_task_dump() -> str:
+    """Await point of every task of the running loop, session tasks first."""
+    loop = asyncio.get_running_loop()
+    tasks = sorted(asyncio.all_tasks(loop),
+                   key=lambda task: (not task.get_name().startswith(SESSION_TASK_PREFIX), task.get_name()))
+    sessions = sum(task.get_name().startswith(SESSION_TASK_PREFIX) for task in tasks)
+    blocks = [f"Task dump {datetime.now():%Y-%m-%d %H:%M:%S}: {len(tasks)} tasks, {sessions} sessions"]
+    blocks.extend("\n".join(_describe(task, loop)) for task in tasks)
+    return "\n\n".join(blocks) + "\n"
+
+
+def _write(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+
+
+async def write_task_dump() -> Tuple[str, str]:
+    # Stacks are read on the loop thread so no task moves while they are collected
+    text = format_task_dump()
+    path = os.path.join(DUMP_DIR, f"tasks_{datetime.now():%Y%m%d_%H%M%S}.txt")
+    await asyncio.to_thread(_write, path, text)
+    logger.info(f"Task dump written to {path}")
+    return path, text
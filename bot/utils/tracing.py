@@ -0,0 +1,154 @@
+import asyncio
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from secrets import token_hex
+from time import monotonic, time
+from typing import Any, Dict, Iterator, List, Optional
+
+from bot.config import settings
+from bot.utils import json_codec
+from bot.utils.logger import logger
+
+FLUSH_SIZE = 200
+# Attributes children copy from their parent unless they set their own
+INHERITED_ATTRIBUTES = ("session", "proxy")
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "started_at", "_started", "duration",
+                 "result", "error", "attributes")
+
+    def __init__(self, name: str, parent: Optional['Span'], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else token_hex(8)
+        self.span_id = token_hex(4)
+        self.parent_id = parent.span_id if parent else None
+        self.started_at = time()
+        self._started = monotonic()
+        self.duration = 0.0
+        self.result = "ok"
+        self.error: Optional[str] = None
+        self.attributes = {key: parent.attributes[key] for key in INHERITED_ATTRIBUTES
+                           if parent and key in parent.attributes}
+        self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.duration = monotonic() - self._started
+        if error is not None:
+            self.result = "error"
+            self.error = type(error).__name__
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.started_at, 6),
+            "duration": round(self.duration, 6),
+            "result": self.result,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    def set(self, **attributes) -> None:
+        pass
+
+
+def _append(path: str, lines: List[str]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as file:
+        file.write("\n".join(lines) + "\n")
+
+
+class SpanExporter:
+    """Buffers finished spans and appends them to a JSONL file, one span per line.
+
+    The buffer is written when a root span finishes or FLUSH_SIZE spans are pending, so a
+    cycle costs one small append instead of a write per request. Writes run in a worker
+    thread, one at a time so spans keep their order; ``close()`` writes what is left.
+    """
+
+    def __init__(self):
+        self._pending: List[str] = []
+        self._writer: Optional[asyncio.Task] = None
+
+    def export(self, span: Span) -> None:
+        self._pending.append(json_codec.dumps(span.to_record()))
+        if span.parent_id is None or len(self._pending) >= FLUSH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending or not settings.TRACE_FILE:
+            return
+        if self._writer is not None and not self._writer.done():
+            return
+        try:
+            self._writer = asyncio.get_running_loop().create_task(self._write())
+        except RuntimeError:
+            self._write_now()
+
+    async def _write(self) -> None:
+        while self._pending:
+            lines, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(_append, settings.TRACE_FILE, lines)
+            except OSError as error:
+                logger.warning(f"Failed to write trace spans to {settings.TRACE_FILE}: {error}")
+
+    def _write_now(self) -> None:
+        lines, self._pending = self._pending, []
+        try:
+            _append(settings.TRACE_FILE, lines)
+        except OSError as error:
+            logger.warning(f"Failed to write trace spans to {settings.TRACE_FILE}: {error}")
+
+    async def close(self) -> None:
+        if self._writer is not None and not self._writer.done():
+            await asyncio.shield(self._writer)
+        if self._pending and settings.TRACE_FILE:
+            await self._write()
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_NOOP_SPAN = _NoopSpan()
+exporter = SpanExporter()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def set_attributes(**attributes) -> None:
+    active = _current_span.get()
+    if active is not None:
+        active.set(**attributes)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """Trace the block as a child of the span active in the current task, or as a new trace."""
+    if not settings.TRACE_FILE:
+        yield _NOOP_SPAN
+        return
+
+    active = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(active)
+    try:
+        yield active
+    except BaseException as error:
+        active.finish(error)
+        raise
+    else:
+        active.finish()
+    finally:
+        _current_span.reset(token)
+        exporter.export(active)
@@ -25,6 +25,8 @@ from bot.config import settings
 from bot.exceptions import InvalidSession
 from bot.utils.proxy_utils import to_pyrogram_proxy, to_telethon_proxy
 from bot.utils import logger, log_error, AsyncInterProcessLock, CONFIG_PATH, first_run
+from bot.utils.metrics import TELEGRAM_WEBVIEW_DURATION
+from bot.utils.tracing import span
 
 class UniversalTelegramClient:
     def __init__(self, **client_params):
@@ -70,13 +72,17 @@ class UniversalTelegramClient:
 
     async def get_app_webview_url(self, bot_username: str, bot_shortname: str, default_val: str) -> str:
         self.is_first_run = await first_run.check_is_first_run(self.session_name)
-        return await self._pyrogram_get_app_webview_url(bot_username, bot_shortname, default_val) if self.is_pyrogram \
-            else await self._telethon_get_app_webview_url(bot_username, bot_shortname, default_val)
+        client = 'pyrogram' if self.is_pyrogram else 'telethon'
+        with span("telegram.app_webview", client=client), TELEGRAM_WEBVIEW_DURATION.time(client=client):
+            return await self._pyrogram_get_app_webview_url(bot_username, bot_shortname, default_val) if self.is_pyrogram \
+                else await self._telethon_get_app_webview_url(bot_username, bot_shortname, default_val)
 
     async def get_webview_url(self, bot_username: str, bot_url: str, default_val: str) -> str:
         self.is_first_run = await first_run.check_is_first_run(self.session_name)
-        return await self._pyrogram_get_webview_url(bot_username, bot_url, default_val) if self.is_pyrogram \
-            else await self._telethon_get_webview_url(bot_username, bot_url, default_val)
+        client = 'pyrogram' if self.is_pyrogram else 'telethon'
+        with span("telegram.webview", client=client), TELEGRAM_WEBVIEW_DURATION.time(client=client):
+            return await self._pyrogram_get_webview_url(bot_username, bot_url, default_val) if self.is_pyrogram \
+                else await self._telethon_get_webview_url(bot_username, bot_url, default_val)
 
     async def join_and_mute_tg_channel(self, link: str):
         return await self._pyrogram_join_and_mute_tg_channel(link) if self.is_pyrogram \
@@ -110,20 +116,22 @@ class UniversalTelegramClient:
             try:
                 if settings.DEBUG_LOGGING:
                     logger.debug(f"[{self.session_name}] Connecting to TelegramClient...")
-                if not self.client.is_connected():
-                    await self.client.connect()
-                await self._telethon_initialize_webview_data(bot_username=bot_username, bot_shortname=bot_shortname)
+                with span("telegram.connect"):
+                    if not self.client.is_connected():
+                        await self.client.connect()
+                    await self._telethon_initialize_webview_data(bot_username=bot_username, bot_shortname=bot_shortname)
                 await asyncio.sleep(uniform(1, 2))
                 ref_id = default_val
                 start = {'start_param': ref_id}
                 if settings.DEBUG_LOGGING:
                     logger.debug(f"[{self.session_name}] RequestAppWebViewRequest params: {self._webview_data}, start={start}")
-                web_view = await self.client(messages.RequestAppWebViewRequest(
-                    **self._webview_data,
-                    platform='android',
-                    write_allowed=True,
-                    **start
-                ))
+                with span("telegram.webview_request"):
+                    web_view = await self.client(messages.RequestAppWebViewRequest(
+                        **self._webview_data,
+                        platform='android',
+                        write_allowed=True,
+                        **start
+                    ))
                 url = web_view.url
                 if settings.DEBUG_LOGGING:
                     logger.debug(f"[{self.session_name}] web_view.url: {url}")
@@ -148,7 +156,8 @@ class UniversalTelegramClient:
             finally:
                 if self.client.is_connected():
                     await self.client.disconnect()
-                    await asyncio.sleep(15)
+                    with span("telegram.cooldown"):
+                        await asyncio.sleep(15)
 
     async def _telethon_get_webview_url(self, bot_username: str, bot_url: str, default_val: str) -> str:
         if settings.DEBUG_LOGGING:
@@ -205,7 +214,8 @@ class UniversalTelegramClient:
             finally:
                 if self.client.is_connected():
                     await self.client.disconnect()
-                    await asyncio.sleep(15)
+                    with span("telegram.cooldown"):
+                        await asyncio.sleep(15)
 
     async def _pyrogram_initialize_webview_data(self, bot_username: str, bot_shortname: str = None):
         if not self._webview_data:
@@ -230,20 +240,22 @@ class UniversalTelegramClient:
             try:
                 if settings.DEBUG_LOGGING:
                     logger.debug(f"[{self.session_name}] Connecting to PyrogramClient...")
-                if not self.client.is_connected:
-                    await self.client.connect()
-                await self._pyrogram_initialize_webview_data(bot_username, bot_shortname)
+                with span("telegram.connect"):
+                    if not self.client.is_connected:
+                        await self.client.connect()
+                    await self._pyrogram_initialize_webview_data(bot_username, bot_shortname)
                 await asyncio.sleep(uniform(1, 2))
                 ref_id = default_val
                 start = {'start_param': ref_id}
                 if settings.DEBUG_LOGGING:
                     logger.debug(f"[{self.session_name}] RequestAppWebView params: {self._webview_data}, start={start}")
-                web_view = await self.client.invoke(pmessages.RequestAppWebView(
-                    **self._webview_data,
-                    platform='android',
-                    write_allowed=True,
-                    **start
-                ))
+                with span("telegram.webview_request"):
+                    web_view = await self.client.invoke(pmessages.RequestAppWebView(
+                        **self._webview_data,
+                        platform='android',
+                        write_allowed=True,
+                        **start
+                    ))
                 url = web_view.url
                 if settings.DEBUG_LOGGING:
                     logger.debug(f"[{self.session_name}] web_view.url: {url}")
@@ -268,7 +280,8 @@ class UniversalTelegramClient:
             finally:
                 if self.client.is_connected:
                     await self.client.disconnect()
-                    await asyncio.sleep(15)
+                    with span("telegram.cooldown"):
+                        await asyncio.sleep(15)
 
     async def _pyrogram_get_webview_url(self, bot_username: str, bot_url: str, default_val: str) -> str:
         if settings.DEBUG_LOGGING:
@@ -327,7 +340,8 @@ class UniversalTelegramClient:
             finally:
                 if self.client.is_connected:
                     await self.client.disconnect()
-                    await asyncio.sleep(15)
+                    with span("telegram.cooldown"):
+                        await asyncio.sleep(15)
 
     async def _telethon_join_and_mute_tg_channel(self, link: str):
         path = link.replace("https://t.me/", "")
@@ -90,6 +90,8 @@ class UpdateManager:
         logger.info("✅ Update successfully installed! Restarting application...")
         
         new_args = [sys.executable, sys.argv[0], "-a", "1", "--update-restart"]
+        # execv skips atexit handlers, drain the queued log lines first
+        logger.remove()
         os.execv(sys.executable, new_args)
 
     async def run(self) -> None:
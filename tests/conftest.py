@@ -0,0 +1,8 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# bot.config reads the required Telegram credentials at import time
+os.environ.setdefault("API_ID", "1")
+os.environ.setdefault("API_HASH", "test")
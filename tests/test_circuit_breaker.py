@@ -0,0 +1,85 @@
+import pytest
+
+from bot.exceptions import CircuitOpenError
+from bot.utils import circuit_breaker
+from bot.utils.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker, "monotonic", clock)
+    return clock
+
+
+def open_breaker(probes: int = 2) -> CircuitBreaker:
+    breaker = CircuitBreaker("api.test", failure_threshold=3, recovery_timeout=60, half_open_probes=probes)
+    for _ in range(3):
+        breaker.check()
+        breaker.record_failure()
+    return breaker
+
+
+def test_opens_after_threshold_failures(clock):
+    breaker = open_breaker()
+    assert breaker.state is CircuitState.OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.check()
+    assert error.value.retry_in == 60
+
+
+def test_failed_probe_reopens_with_a_longer_timeout(clock):
+    breaker = open_breaker()
+    clock.now += 60
+    breaker.check()
+    assert breaker.state is CircuitState.HALF_OPEN
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.retry_in() == 120
+    clock.now += 119
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_successful_probes_close_the_circuit(clock):
+    breaker = open_breaker()
+    clock.now += 60
+    breaker.check()
+    breaker.check()
+    breaker.record_success()
+    assert breaker.state is CircuitState.HALF_OPEN
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+
+
+def test_probe_slots_are_limited_and_released(clock):
+    breaker = open_breaker(probes=1)
+    clock.now += 60
+    breaker.check()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    # A rate-limited or cancelled probe says nothing about the host and frees its slot
+    breaker.release()
+    breaker.check()
+
+
+def test_check_available_does_not_take_a_probe_slot(clock):
+    breaker = open_breaker(probes=1)
+    with pytest.raises(CircuitOpenError):
+        breaker.check_available()
+    clock.now += 60
+    breaker.check()
+    with pytest.raises(CircuitOpenError):
+        breaker.check_available()
+    breaker.release()
+    breaker.check_available()
+    breaker.check_available()
+    breaker.check()
@@ -0,0 +1,69 @@
+import asyncio
+from time import time
+
+import pytest
+
+from bot.core import tapper
+from bot.core.endpoints import cache_invalidations, cache_ttls
+from bot.core.tutorial import ATTACK_WAIT, TRAINING_WAIT, UPGRADE_WAIT
+from bot.utils.response_cache import ResponseCache
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(tapper.asyncio, "sleep", sleep)
+    return delays
+
+
+def make_bot(poll_data=None) -> tapper.FomoFightersBot:
+    bot = tapper.FomoFightersBot.__new__(tapper.FomoFightersBot)
+    bot.session_name = "test"
+    bot._selected_race = "elf"
+    bot._completion_times = {}
+    bot._response_cache = ResponseCache(cache_ttls(), cache_invalidations())
+    polls = bot.polls = []
+
+    async def invoke(name, **params):
+        polls.append(name)
+        return {"success": True, "data": poll_data}
+
+    bot._invoke = invoke
+    return bot
+
+
+def test_timer_of_another_building_is_not_reused(sleeps):
+    bot = make_bot()
+    bot._store_completion_time(("/building/buy", (("position", 6),)), time() + 200)
+    asyncio.run(bot._wait_for_completion(UPGRADE_WAIT.of(position=1)))
+    # The castle timer was never recorded, so the building list is polled and the fallback used
+    assert bot.polls == ["building_info"]
+    assert 55 <= sleeps[-1] <= 65
+    assert ("/building/buy", (("position", 6),)) in bot._completion_times
+
+
+def test_timer_of_the_awaited_troop_is_used(sleeps):
+    bot = make_bot()
+    bot._store_completion_time(("/troops/buy", (("troopKey", "elf_scout_10"),)), time() + 40)
+    asyncio.run(bot._wait_for_completion(TRAINING_WAIT.of(troopKey="{race}_scout_10")))
+    assert bot.polls == []
+    assert 40 <= sleeps[-1] <= 42
+    assert not bot._completion_times
+
+
+def test_attack_wait_is_capped_near_the_baseline(sleeps):
+    bot = make_bot()
+    bot._store_completion_time(("/attack/create", (("target", 7),)), time() + 600)
+    asyncio.run(bot._wait_for_completion(ATTACK_WAIT.of(target=7)))
+    assert sleeps[-1] == ATTACK_WAIT.max_wait <= 15
+
+
+def test_finished_timers_are_dropped():
+    bot = make_bot()
+    bot._store_completion_time(("/troops/buy", (("troopKey", "elf_archer_10"),)), time() - 1)
+    bot._store_completion_time(("/building/buy", (("position", 4),)), time() + 30)
+    assert list(bot._completion_times) == [("/building/buy", (("position", 4),))]
@@ -0,0 +1,69 @@
+import asyncio
+from http.cookies import SimpleCookie
+from time import time
+
+from aiohttp import CookieJar
+from yarl import URL
+
+from bot.utils.cookie_store import dump_cookies, restore_cookies
+
+API_URL = URL("https://api.fomofighters.xyz/telegram/auth")
+
+
+def new_jar() -> CookieJar:
+    async def create() -> CookieJar:
+        return CookieJar()
+    return asyncio.run(create())
+
+
+def receive(jar: CookieJar, header: str, url: URL = API_URL) -> None:
+    cookies = SimpleCookie()
+    cookies.load(header)
+    jar.update_cookies(cookies, url)
+
+
+def test_max_age_expiry_is_fixed_at_receipt_and_the_jar_is_untouched():
+    jar = new_jar()
+    received_at = time()
+    receive(jar, "user_auth_hash=abc; Max-Age=3600; Path=/")
+    first = dump_cookies(jar)
+    second = dump_cookies(jar)
+    assert first == second
+    assert abs(first[0]["expires_at"] - (received_at + 3600)) < 5
+    morsel = next(iter(jar))
+    assert morsel["max-age"] == "3600"
+    assert morsel["expires"] == ""
+
+
+def test_host_only_cookie_is_restored_host_only():
+    jar = new_jar()
+    receive(jar, "user_auth_hash=abc; Path=/")
+    dumped = dump_cookies(jar)
+    assert dumped[0]["host_only"] is True
+
+    restored = new_jar()
+    restore_cookies(restored, dumped)
+    assert "user_auth_hash" in restored.filter_cookies(URL("https://api.fomofighters.xyz/"))
+    assert "user_auth_hash" not in restored.filter_cookies(URL("https://sub.api.fomofighters.xyz/"))
+    assert dump_cookies(restored) == dumped
+
+
+def test_domain_cookie_round_trip():
+    jar = new_jar()
+    receive(jar, "session=xyz; Domain=fomofighters.xyz; Path=/; Max-Age=600; Secure")
+    dumped = dump_cookies(jar)
+    assert "host_only" not in dumped[0]
+
+    restored = new_jar()
+    restore_cookies(restored, dumped)
+    assert "session" in restored.filter_cookies(URL("https://api.fomofighters.xyz/"))
+    assert dump_cookies(restored)[0]["domain"] == "fomofighters.xyz"
+    assert abs(dump_cookies(restored)[0]["expires_at"] - dumped[0]["expires_at"]) < 1
+
+
+def test_expired_cookies_are_not_restored():
+    jar = new_jar()
+    cookies = [{"name": "user_auth_hash", "value": "abc", "domain": "api.fomofighters.xyz", "path": "/",
+                "expires_at": time() - 1, "host_only": True}]
+    assert restore_cookies(jar, cookies) == []
+    assert len(jar) == 0
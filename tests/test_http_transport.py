@@ -0,0 +1,17 @@
+import asyncio
+
+from bot.utils.http_transport import SessionTransport, open_transports
+
+
+def test_gauge_counts_down_clients_closed_elsewhere():
+    async def scenario():
+        transport = SessionTransport("gauge")
+        # Closed outside the transport before the proxy switch
+        await transport.client.close()
+        await transport.switch(None)
+        assert open_transports().get("gauge") == 1
+        await transport.close()
+        await transport.close()
+        assert "gauge" not in open_transports()
+
+    asyncio.run(scenario())
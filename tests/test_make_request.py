@@ -0,0 +1,104 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import aiohttp
+import pytest
+
+from bot.core import tapper
+from bot.exceptions import CircuitOpenError, RetryBudgetExhausted
+from bot.utils.circuit_breaker import CircuitState, get_circuit_breaker
+
+
+class FakeResponse:
+    def __init__(self, status, body=b"{}", headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self.cookies = {}
+        self._body = body
+
+    async def read(self):
+        return self._body
+
+    async def text(self):
+        return self._body.decode()
+
+
+class FakeTransport:
+    """Answers requests from a script of responses and exceptions, the last one repeats."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.requests = 0
+
+    @asynccontextmanager
+    async def request(self, method, url, **kwargs):
+        self.requests += 1
+        outcome = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if outcome == "hang":
+            await asyncio.sleep(3600)
+        yield outcome
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(tapper.asyncio, "sleep", sleep)
+    return delays
+
+
+def make_bot(transport) -> tapper.BaseBot:
+    bot = tapper.BaseBot.__new__(tapper.BaseBot)
+    bot.session_name = "test"
+    bot._transport = transport
+    return bot
+
+
+def test_retry_after_overrides_backoff(sleeps):
+    transport = FakeTransport(FakeResponse(429, headers={"Retry-After": "30"}), FakeResponse(200, b'{"ok": 1}'))
+    result = asyncio.run(make_bot(transport).make_request("GET", "https://retry-after.test/a"))
+    assert result == {"ok": 1}
+    assert sleeps == [30]
+
+
+def test_budget_runs_out_mid_loop(sleeps, monkeypatch):
+    monkeypatch.setattr(tapper.settings, "REQUEST_RETRY_BUDGET", 2)
+    transport = FakeTransport(aiohttp.ServerDisconnectedError())
+    bot = make_bot(transport)
+    assert asyncio.run(bot.make_request("GET", "https://budget.test/a")) is None
+    assert transport.requests == 3
+    assert len(sleeps) == 2
+
+    with pytest.raises(RetryBudgetExhausted):
+        asyncio.run(bot.make_request("GET", "https://budget.test/a", raise_on_exhausted=True))
+
+
+def test_non_idempotent_request_is_not_repeated_after_a_gateway_error(sleeps):
+    transport = FakeTransport(FakeResponse(502), FakeResponse(200))
+    assert asyncio.run(make_bot(transport).make_request("POST", "https://write.test/a", idempotent=False)) is None
+    assert transport.requests == 1
+    assert sleeps == []
+
+
+def test_cancelled_probe_releases_its_half_open_slot():
+    breaker = get_circuit_breaker("probe.test")
+    breaker.state = CircuitState.HALF_OPEN
+    breaker.half_open_probes = 1
+    bot = make_bot(FakeTransport("hang"))
+
+    async def cancel_probe():
+        task = asyncio.create_task(bot.make_request("GET", "https://probe.test/a"))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            breaker.check_available()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_probe())
+    breaker.check_available()
@@ -0,0 +1,67 @@
+import re
+
+from bot.utils.metrics import MetricsRegistry
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})? (\S+)$')
+HISTOGRAM_SUFFIXES = ("_bucket", "_sum", "_count")
+
+
+def parse_exposition(text: str) -> dict:
+    """Minimal text format 0.0.4 parser: family name -> (type, help, sample names)."""
+    families = {}
+    current = None
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            name, documentation = line[len("# HELP "):].split(" ", 1)
+            families.setdefault(name, {"help": None, "type": "untyped", "samples": []})["help"] = documentation
+        elif line.startswith("# TYPE "):
+            name, kind = line[len("# TYPE "):].split(" ")
+            families.setdefault(name, {"help": None, "type": "untyped", "samples": []})["type"] = kind
+            current = name
+        elif line:
+            match = SAMPLE.match(line)
+            assert match, f"malformed sample line: {line!r}"
+            name = match.group(1)
+            family = families.get(current)
+            allowed = {current} if family and family["type"] != "histogram" else \
+                {f"{current}{suffix}" for suffix in HISTOGRAM_SUFFIXES}
+            assert name in allowed, f"sample {name} does not belong to the typed family {current}"
+            family["samples"].append(name)
+    return families
+
+
+def make_registry() -> MetricsRegistry:
+    registry = MetricsRegistry()
+    registry.counter("fomo_relogins", "Re-logins.", ("result",)).inc(result="ok")
+    registry.counter("fomo_proxy_switches_total", "Proxy switches.").inc()
+    registry.gauge("fomo_sessions", "Sessions.").set(3)
+    registry.histogram("fomo_request_seconds", "Request duration.", buckets=(0.1, 1)).observe(0.5)
+    return registry
+
+
+def test_counter_families_carry_the_total_suffix():
+    families = parse_exposition(make_registry().render())
+    assert families["fomo_relogins_total"]["type"] == "counter"
+    assert families["fomo_relogins_total"]["help"] == "Re-logins."
+    assert families["fomo_relogins_total"]["samples"] == ["fomo_relogins_total"]
+    assert families["fomo_proxy_switches_total"]["samples"] == ["fomo_proxy_switches_total"]
+    assert "fomo_relogins" not in families
+
+
+def test_every_sample_is_typed():
+    families = parse_exposition(make_registry().render())
+    assert families["fomo_sessions"]["type"] == "gauge"
+    assert families["fomo_request_seconds"]["type"] == "histogram"
+    assert set(families["fomo_request_seconds"]["samples"]) == {
+        "fomo_request_seconds_bucket", "fomo_request_seconds_sum", "fomo_request_seconds_count"}
+    assert all(family["type"] != "untyped" for family in families.values())
+
+
+def test_histogram_buckets_are_cumulative():
+    text = make_registry().render()
+    buckets = [line for line in text.splitlines() if line.startswith("fomo_request_seconds_bucket")]
+    assert buckets == [
+        'fomo_request_seconds_bucket{le="0.1"} 0',
+        'fomo_request_seconds_bucket{le="1"} 1',
+        'fomo_request_seconds_bucket{le="+Inf"} 1',
+    ]
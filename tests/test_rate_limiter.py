@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from bot.utils import rate_limiter
+from bot.utils.rate_limiter import RateLimiter, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.now += delay
+        self.slept += delay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter, "monotonic", clock)
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", clock.sleep)
+    return clock
+
+
+def acquire(bucket: TokenBucket, times: int) -> None:
+    async def run():
+        for _ in range(times):
+            await bucket.acquire()
+    asyncio.run(run())
+
+
+def test_burst_up_to_capacity_then_paced_at_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=4)
+    acquire(bucket, 4)
+    assert clock.slept == 0
+    acquire(bucket, 3)
+    assert clock.slept == pytest.approx(1.5)
+
+
+def test_idle_time_refills_no_more_than_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=4)
+    acquire(bucket, 4)
+    clock.now += 60
+    acquire(bucket, 5)
+    assert clock.slept == pytest.approx(0.5)
+
+
+def test_throttle_halves_the_rate_down_to_a_floor_and_recover_restores_it(clock):
+    bucket = TokenBucket(rate=16, capacity=4)
+    bucket.throttle()
+    assert bucket.rate == 8
+    for _ in range(10):
+        bucket.throttle()
+    assert bucket.rate == 1
+    for _ in range(30):
+        bucket.recover()
+    assert bucket.rate == 16
+
+
+def test_throttle_drops_the_saved_burst(clock):
+    bucket = TokenBucket(rate=4, capacity=4)
+    bucket.throttle()
+    acquire(bucket, 1)
+    assert clock.slept == pytest.approx(0.5)
+
+
+def test_rate_limited_response_slows_the_class_and_the_global_bucket(clock):
+    limiter = RateLimiter(rate=20, burst=40, classes={"read": (10, 20), "write": (5, 10)})
+    limiter.feedback("read", 429)
+    assert limiter._bucket("read").rate == 5
+    assert limiter._global.rate == 10
+    assert limiter._bucket("write").rate == 5
+    limiter.feedback("read", 200)
+    assert limiter._bucket("read").rate == 5.5
+
+
+def test_unknown_class_uses_the_write_quota(clock):
+    limiter = RateLimiter(rate=20, burst=40, classes={"read": (10, 20), "write": (5, 10)})
+    assert limiter._bucket("upload") is limiter._bucket("write")
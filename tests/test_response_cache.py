@@ -0,0 +1,83 @@
+import pytest
+
+from bot.core.endpoints import cache_invalidations, cache_ttls
+from bot.utils import response_cache
+from bot.utils.response_cache import ResponseCache
+
+TTLS = {"/building/info": 30, "/troops/info": 30, "/user/data/all": 10}
+INVALIDATIONS = {"/troops/buy": ("/troops/info", "/user/data/all"), "/onboarding/finish": (), "/building/buy": None}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache, "monotonic", clock)
+    return clock
+
+
+def filled_cache() -> ResponseCache:
+    cache = ResponseCache(TTLS, INVALIDATIONS)
+    for path in TTLS:
+        cache.set(path, "{}", {"path": path})
+    return cache
+
+
+def cached_paths(cache: ResponseCache):
+    return {path for path in TTLS if cache.get(path, "{}") is not None}
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = filled_cache()
+    assert cache.get("/user/data/all", "{}") == {"path": "/user/data/all"}
+    clock.now += 11
+    assert cached_paths(cache) == {"/building/info", "/troops/info"}
+    clock.now += 20
+    assert cached_paths(cache) == set()
+
+
+def test_entries_are_keyed_by_request_body(clock):
+    cache = ResponseCache(TTLS, INVALIDATIONS)
+    cache.set("/building/info", '{"position":1}', {"level": 2})
+    assert cache.get("/building/info", '{"position":2}') is None
+
+
+def test_mutation_invalidates_only_the_listed_paths(clock):
+    cache = filled_cache()
+    cache.on_mutation("/troops/buy")
+    assert cached_paths(cache) == {"/building/info"}
+
+
+def test_mutation_with_no_listed_paths_keeps_the_cache(clock):
+    cache = filled_cache()
+    cache.on_mutation("/onboarding/finish")
+    assert cached_paths(cache) == set(TTLS)
+
+
+def test_unknown_mutation_clears_everything(clock):
+    cache = filled_cache()
+    cache.on_mutation("/building/buy")
+    assert cached_paths(cache) == set()
+    cache = filled_cache()
+    cache.on_mutation("/something/new")
+    assert cached_paths(cache) == set()
+
+
+def test_reads_do_not_invalidate(clock):
+    cache = filled_cache()
+    cache.on_mutation("/troops/info")
+    assert cached_paths(cache) == set(TTLS)
+
+
+def test_endpoint_table_invalidates_known_cached_paths():
+    ttls = cache_ttls()
+    for path, affected in cache_invalidations().items():
+        assert path not in ttls
+        assert all(cached in ttls for cached in affected or ())
@@ -0,0 +1,87 @@
+import asyncio
+from email.utils import formatdate
+from time import time
+
+import aiohttp
+import pytest
+
+from bot.config import settings
+from bot.utils import retry_policy
+from bot.utils.retry_policy import (
+    FailureKind, RetryBudget, classify_exception, classify_status, is_safe_to_repeat, parse_retry_after
+)
+
+
+@pytest.fixture(autouse=True)
+def ceiling_delays(monkeypatch):
+    # Backoff is drawn from [ceiling / 2, ceiling], the tests use the upper end
+    monkeypatch.setattr(retry_policy, "uniform", lambda low, high: high)
+
+
+@pytest.mark.parametrize("status, kind", [
+    (401, FailureKind.AUTH),
+    (403, FailureKind.AUTH),
+    (429, FailureKind.RATE_LIMIT),
+    (418, FailureKind.RATE_LIMIT),
+    (502, FailureKind.GATEWAY),
+    (522, FailureKind.GATEWAY),
+    (200, None),
+    (400, None),
+    (404, None),
+])
+def test_classify_status(status, kind):
+    assert classify_status(status) is kind
+
+
+def test_classify_exception():
+    assert classify_exception(aiohttp.ServerDisconnectedError()) is FailureKind.TRANSPORT
+    assert classify_exception(asyncio.TimeoutError()) is FailureKind.TRANSPORT
+    assert classify_exception(ConnectionResetError()) is FailureKind.TRANSPORT
+    # A non-JSON body is an answer from the server, repeating it does not help
+    assert classify_exception(aiohttp.ContentTypeError(None, ())) is None
+    assert classify_exception(ValueError("bad payload")) is None
+
+
+def test_only_unsent_writes_are_safe_to_repeat():
+    refused = aiohttp.ClientConnectorError(None, ConnectionRefusedError())
+    assert is_safe_to_repeat(FailureKind.TRANSPORT, refused)
+    assert not is_safe_to_repeat(FailureKind.TRANSPORT, aiohttp.ServerDisconnectedError())
+    assert not is_safe_to_repeat(FailureKind.GATEWAY)
+    assert is_safe_to_repeat(FailureKind.RATE_LIMIT)
+    assert is_safe_to_repeat(FailureKind.AUTH)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert 55 <= parse_retry_after(formatdate(time() + 60, usegmt=True)) <= 60
+    assert parse_retry_after(formatdate(time() - 60, usegmt=True)) == 0
+
+
+def test_retry_after_overrides_a_shorter_backoff():
+    budget = RetryBudget(total=4)
+    assert budget.next_delay(FailureKind.RATE_LIMIT, retry_after=42) == 42
+    # The second rate limit backoff ceiling is 10s, longer than the server asks for
+    assert budget.next_delay(FailureKind.RATE_LIMIT, retry_after=3) == 10
+
+
+def test_retry_after_beyond_the_maximum_gives_up():
+    budget = RetryBudget(total=4)
+    assert budget.next_delay(FailureKind.RATE_LIMIT, retry_after=settings.RETRY_AFTER_MAX + 1) is None
+    assert budget.remaining == 4
+
+
+def test_backoff_doubles_up_to_the_cap_per_kind():
+    budget = RetryBudget(total=10)
+    assert [budget.next_delay(FailureKind.GATEWAY) for _ in range(4)] == [2, 4, 8, None]
+    assert budget.next_delay(FailureKind.TRANSPORT) == 1
+
+
+def test_budget_is_shared_between_kinds():
+    budget = RetryBudget(total=3)
+    assert budget.next_delay(FailureKind.GATEWAY) is not None
+    assert budget.next_delay(FailureKind.TRANSPORT) is not None
+    assert budget.next_delay(FailureKind.RATE_LIMIT) is not None
+    assert budget.next_delay(FailureKind.TRANSPORT) is None
+    assert budget.remaining == 0
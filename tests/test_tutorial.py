@@ -0,0 +1,38 @@
+from bot.core.game_state import GameState
+from bot.core.tutorial import FINAL_ONBOARDING_STEP, TUTORIAL_STEPS, is_tutorial_pending, pending_steps
+
+
+def make_state(race=None, onboarding=()) -> GameState:
+    state = GameState()
+    state.hero.update({"race": race, "onboarding": list(onboarding)})
+    return state
+
+
+def test_new_account_is_pending():
+    assert is_tutorial_pending(make_state())
+
+
+def test_partial_onboarding_is_pending():
+    # Interrupted mid-tutorial: race chosen and some steps done, but not the final one
+    assert is_tutorial_pending(make_state(race="elves", onboarding=[1, 10000, 10010, 10020]))
+
+
+def test_final_step_finishes_the_tutorial():
+    assert not is_tutorial_pending(make_state(race="elves", onboarding=[1, 10000, FINAL_ONBOARDING_STEP]))
+
+
+def test_partial_onboarding_resumes_from_server_state():
+    state = make_state(race="elves", onboarding=[1, 10000, 10010, 10020])
+    keys = [step.key for step in pending_steps(state)]
+    assert "onboarding_1" not in keys
+    assert "select_race" not in keys
+    assert "onboarding_10020" not in keys
+    assert "onboarding_10050" in keys
+    assert keys[-1] == f"onboarding_{FINAL_ONBOARDING_STEP}"
+
+
+def test_checkpoint_picks_the_resume_step():
+    checkpoint = "build_lumber_mill_1_1"
+    keys = [step.key for step in pending_steps(make_state(race="elves", onboarding=[1]), checkpoint)]
+    step_keys = [step.key for step in TUTORIAL_STEPS]
+    assert keys[0] == step_keys[step_keys.index(checkpoint) + 1]